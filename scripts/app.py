@@ -5,141 +5,171 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-import re
-from typing import Dict, List
+import hashlib
+from typing import List, Sequence, Tuple
 
 import pandas as pd
 import altair as alt
 import streamlit as st
 
+from bibparser import SECTION_KEYS as ALL_SECTION_KEYS, BibEntry, load_bib
+from bibtable import AuthorshipTable
+from build_static_charts import SECTION_TITLES, author_registry
+from coauthors import CoauthorGraph
+
+
+SECTION_KEYS = ("ijournal_papers", "reviewed_iconference")
+HIGHLIGHT_AUTHOR = "K. Kawaharazuka"
+
+
+def load_ijournal_entries(bib_path: Path, sections: Sequence[str] = SECTION_KEYS) -> List[BibEntry]:
+    db = load_bib(bib_path)
+    return [entry for entry in db.iter_sections(sections) if entry.authors and entry.year_num is not None]
+
 
 @dataclass
-class BibEntry:
+class DashboardData:
+    df: pd.DataFrame
+    df_all: pd.DataFrame
+    years: List[int]
     authors: List[str]
-    year: int
-    venue: str
-
-
-SECTION_KEYS = {"ijournal_papers", "reviewed_iconference"}
-
-
-def _clean_bib_value(text: str) -> str:
-    cleaned = text.strip().rstrip(",")
-    cleaned = cleaned.strip("{}").strip()
-    return cleaned
-
-
-def _normalize_venue_label(venue: str) -> str:
-    match = re.match(r"^(.*?)(19|20)\d{2}$", venue)
-    if match:
-        return match.group(1)
-    return venue
-
-
-def _parse_entry(lines: List[str]) -> BibEntry | None:
-    fields: Dict[str, str] = {}
-    for line in lines:
-        if "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        key = key.strip().lower()
-        value = _clean_bib_value(value)
-        fields[key] = value
-    if "author" not in fields or "year" not in fields:
-        return None
-
-    authors_raw = fields["author"].replace(" and ", ",")
-    authors = [a.strip() for a in authors_raw.split(",") if a.strip()]
-    year_match = re.search(r"\d{4}", fields["year"])
-    venue_value = fields.get("journal") or fields.get("booktitle")
-    venue = _normalize_venue_label(venue_value) if venue_value else "Unknown"
-    if not authors or not year_match:
-        return None
-    return BibEntry(authors=authors, year=int(year_match.group(0)), venue=venue)
-
-
-def load_ijournal_entries(bib_path: Path) -> List[BibEntry]:
-    entries: List[BibEntry] = []
-    in_section = False
-    current_lines: List[str] = []
-    in_entry = False
-    with bib_path.open("r", encoding="utf-8") as fh:
-        for raw_line in fh:
-            line = raw_line.strip()
-            if not line:
-                continue
-            if line.startswith("%"):
-                in_section = any(key in line for key in SECTION_KEYS)
-                continue
-            if not in_section:
-                continue
-
-            if line.startswith("@"):
-                in_entry = True
-                current_lines = []
-                continue
-            if in_entry and line == "}":
-                entry = _parse_entry(current_lines)
-                if entry:
-                    entries.append(entry)
-                in_entry = False
-                current_lines = []
-                continue
-            if in_entry:
-                current_lines.append(line)
-
-    return entries
-
-
-def build_count_dataframe(entries: List[BibEntry]) -> pd.DataFrame:
-    rows = []
-    for entry in entries:
-        first_author = entry.authors[0]
-        rows.append({"year": entry.year, "author": first_author, "venue": entry.venue, "count": 1})
-    if not rows:
-        return pd.DataFrame(columns=["year", "author", "venue", "count"])
-    df = pd.DataFrame(rows)
-    df = df.groupby(["year", "author", "venue"], as_index=False)["count"].sum()
-    return df
-
-
-def build_all_author_dataframe(entries: List[BibEntry]) -> pd.DataFrame:
-    rows = []
-    for entry in entries:
-        for author in entry.authors:
-            rows.append({"year": entry.year, "author": author, "count": 1})
-    if not rows:
-        return pd.DataFrame(columns=["year", "author", "count"])
-    df = pd.DataFrame(rows)
-    df = df.groupby(["year", "author"], as_index=False)["count"].sum()
-    return df
+    all_authors: List[str]
+    highlight_author: str
+
+
+def bib_digest(bib_path: Path) -> str:
+    return hashlib.sha1(bib_path.read_bytes()).hexdigest()
+
+
+# Keyed on the bib content hash: every rerun (i.e. every widget interaction)
+# and every viewer session shares one parse and one set of aggregates.
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_dashboard_data(bib_path: str, digest: str, sections: Tuple[str, ...] = SECTION_KEYS) -> DashboardData:
+    entries = load_ijournal_entries(Path(bib_path), sections)
+    table = AuthorshipTable(entries, author_registry(entries))
+    df = table.first_author_counts()
+    df_all = table.all_author_counts()
+    return DashboardData(
+        df=df,
+        df_all=df_all,
+        years=sorted(df["year"].unique().tolist()),
+        authors=sorted(df["author"].unique().tolist()),
+        all_authors=sorted(df_all["author"].unique().tolist()),
+        highlight_author=table.registry.display(HIGHLIGHT_AUTHOR),
+    )
+
+
+# The graph is shared as a resource rather than copied out of the cache on
+# every rerun; neighbour queries only slice its CSR arrays.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_coauthor_graph(bib_path: str, digest: str, sections: Tuple[str, ...] = SECTION_KEYS) -> CoauthorGraph:
+    entries = load_ijournal_entries(Path(bib_path), sections)
+    return CoauthorGraph(AuthorshipTable(entries, author_registry(entries)))
+
+
+def sections_title(sections: Sequence[str]) -> str:
+    return " + ".join(SECTION_TITLES.get(key, key) for key in sections)
+
+
+def render_coauthor_page(graph: CoauthorGraph, highlight_author: str, sections: Sequence[str]) -> None:
+    st.title(f"{sections_title(sections)}: Co-authorship")
+    if graph.n_edges == 0:
+        st.warning(f"No co-authored entries found in {' or '.join(sections)}.")
+        return
+
+    col_authors, col_pairs, col_papers = st.columns(3)
+    col_authors.metric("Authors", len(graph.table.authors))
+    col_pairs.metric("Co-author pairs", graph.n_edges)
+    col_papers.metric("Pair-papers", graph.n_pair_papers)
+
+    st.subheader("Distinct Co-authors per Author")
+    top_n = st.slider("Authors shown", 10, 100, 30, step=10)
+    chart_degree = (
+        alt.Chart(graph.top_by_degree(top_n))
+        .mark_bar()
+        .encode(
+            x=alt.X("author:N", title="Author", sort="-y"),
+            y=alt.Y("collaborators:Q", title="Co-authors"),
+            tooltip=["author:N", "collaborators:Q", alt.Tooltip("coauthored:Q", title="Joint papers")],
+        )
+        .properties(height=420)
+    )
+    st.altair_chart(chart_degree, use_container_width=True)
+
+    st.subheader("Collaborations by Year")
+    by_year = graph.collaborations_by_year().melt("year", var_name="kind", value_name="count")
+    chart_years = (
+        alt.Chart(by_year)
+        .mark_bar()
+        .encode(
+            x=alt.X("year:O", title="Year"),
+            xOffset="kind:N",
+            y=alt.Y("count:Q", title="Pairs"),
+            color=alt.Color("kind:N", title=""),
+            tooltip=["year:O", "kind:N", "count:Q"],
+        )
+        .properties(height=420)
+    )
+    st.altair_chart(chart_years, use_container_width=True)
+
+    st.subheader("Top Collaborators")
+    authors = graph.table.authors
+    index = authors.index(highlight_author) if highlight_author in authors else 0
+    author = st.selectbox("Author", authors, index=index)
+    collaborators = pd.DataFrame(graph.top_collaborators(author, n=top_n), columns=["coauthor", "papers"])
+    if collaborators.empty:
+        st.info(f"{author} has no co-authors in the selected sections.")
+        return
+    chart_collaborators = (
+        alt.Chart(collaborators)
+        .mark_bar()
+        .encode(
+            x=alt.X("coauthor:N", title="Co-author", sort="-y"),
+            y=alt.Y("papers:Q", title="Joint papers"),
+            tooltip=["coauthor:N", "papers:Q"],
+        )
+        .properties(height=420)
+    )
+    st.altair_chart(chart_collaborators, use_container_width=True)
+    st.dataframe(collaborators)
 
 
 def main() -> None:
     st.set_page_config(page_title="International Journal First Authors", layout="wide")
-    st.title("International Journal + International Conference: First Author Counts by Year")
 
     bib_path = Path(__file__).resolve().parents[1] / "main.bib"
     if not bib_path.exists():
         st.error(f"main.bib not found: {bib_path}")
         return
 
-    entries = load_ijournal_entries(bib_path)
-    df = build_count_dataframe(entries)
-    df_all = build_all_author_dataframe(entries)
-
-    if df.empty:
-        st.warning("No entries found in ijournal_papers or reviewed_iconference.")
+    digest = bib_digest(bib_path)
+    page = st.sidebar.radio("Page", ["Publication counts", "Co-authorship"])
+    sections = tuple(st.sidebar.multiselect("Sections", ALL_SECTION_KEYS, default=list(SECTION_KEYS)))
+    if not sections:
+        st.info("Select at least one section.")
+        return
+    data = load_dashboard_data(str(bib_path), digest, sections)
+    highlight_choices = data.all_authors or [data.highlight_author]
+    highlight_author = st.sidebar.selectbox(
+        "Highlighted author",
+        highlight_choices,
+        index=highlight_choices.index(data.highlight_author) if data.highlight_author in highlight_choices else 0,
+    )
+    if page == "Co-authorship":
+        render_coauthor_page(load_coauthor_graph(str(bib_path), digest, sections), highlight_author, sections)
         return
 
-    years = sorted(df["year"].unique())
-    selected_years = st.multiselect("Years", years, default=years)
+    st.title(f"{sections_title(sections)}: First Author Counts by Year")
+    df = data.df
+    df_all = data.df_all
 
-    authors = sorted(df["author"].unique())
-    selected_authors = st.multiselect("First authors", authors, default=authors)
+    if df.empty:
+        st.warning(f"No entries found in {' or '.join(sections)}.")
+        return
 
-    all_authors = sorted(df_all["author"].unique())
-    selected_all_authors = st.multiselect("All authors", all_authors, default=all_authors)
+    selected_years = st.multiselect("Years", data.years, default=data.years)
+    selected_authors = st.multiselect("First authors", data.authors, default=data.authors)
+    selected_all_authors = st.multiselect("All authors", data.all_authors, default=data.all_authors)
 
     filtered = df[df["year"].isin(selected_years) & df["author"].isin(selected_authors)]
     if filtered.empty:
@@ -206,10 +236,10 @@ def main() -> None:
         )
         st.altair_chart(chart_by_all_authors, use_container_width=True)
 
-    st.subheader("K. Kawaharazuka: Counts by Year (colored by venue)")
-    kk_filtered = filtered[filtered["author"] == "K. Kawaharazuka"]
+    st.subheader(f"{highlight_author}: Counts by Year (colored by venue)")
+    kk_filtered = filtered[filtered["author"] == highlight_author]
     if kk_filtered.empty:
-        st.info("No entries for K. Kawaharazuka in the selected filters.")
+        st.info(f"No entries for {highlight_author} in the selected filters.")
     else:
         chart_kk = (
             alt.Chart(kk_filtered)
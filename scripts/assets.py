@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import shutil
+from typing import Dict, Iterable, Set
+
+from writer import OutputWriter
+
+
+MANIFEST_FILENAME = "asset-manifest.json"
+HEADERS_FILENAME = "_headers"
+HASH_LENGTH = 10
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_REF = re.compile(r'\b(href|src|srcset)="([^"]*)"')
+# Pages link to each other by name; only the files they load are fingerprinted.
+_NOT_ASSET = re.compile(r"^(?:[a-z][a-z0-9+.-]*:|//|#)|\.html?(?:[?#]|$)", re.IGNORECASE)
+
+
+def _urls(attr: str, value: str) -> Iterable[str]:
+    if attr != "srcset":
+        return [value]
+    return [candidate.split()[0] for candidate in value.split(",") if candidate.strip()]
+
+
+def local_refs(html: str) -> Set[str]:
+    return {url for match in _REF.finditer(html) for url in _urls(match.group(1), match.group(2))
+            if url and not _NOT_ASSET.search(url)}
+
+
+def _hashed_name(path: str, digest: str) -> str:
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(directory, "%s.%s%s" % (stem, digest[:HASH_LENGTH], ext)).replace(os.sep, "/")
+
+
+def fingerprint(root, refs: Iterable[str], writer: OutputWriter) -> Dict[str, str]:
+    # Copies every referenced file under root to <stem>.<sha1 prefix><ext>
+    # next to it (the original stays for outside links), writes the
+    # original -> fingerprinted manifest and a _headers file marking the
+    # copies immutable, and removes copies the previous manifest had made.
+    root = Path(root)
+    manifest_path = root / MANIFEST_FILENAME
+    try:
+        with manifest_path.open("r", encoding="utf-8") as fh:
+            previous = json.load(fh)
+    except (OSError, ValueError):
+        previous = {}
+
+    names = {}
+    for ref in sorted(refs):
+        path = root / ref
+        if not path.is_file():
+            continue
+        h = hashlib.sha1()
+        with path.open("rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        names[ref] = _hashed_name(ref, h.hexdigest())
+        target = root / names[ref]
+        # written through a temporary file, so an interrupted copy never
+        # leaves a truncated asset under the final name
+        if not target.exists() or target.stat().st_size != path.stat().st_size:
+            with path.open("rb") as src, writer.open(target, binary=True) as dst:
+                shutil.copyfileobj(src, dst)
+
+    for old in set(previous.values()) - set(names.values()):
+        try:
+            (root / old).unlink()
+        except OSError:
+            pass
+
+    with writer.open(manifest_path) as fh:
+        json.dump(names, fh, indent=1, sort_keys=True)
+        fh.write("\n")
+    with writer.open(root / HEADERS_FILENAME) as fh:
+        for name in sorted(names.values()):
+            fh.write("/%s\n  Cache-Control: %s\n" % (name, IMMUTABLE))
+    return names
+
+
+def rewrite_refs(html: str, names: Dict[str, str]) -> str:
+    def replace(match):
+        attr, value = match.group(1), match.group(2)
+        if attr == "srcset":
+            candidates = []
+            for candidate in value.split(","):
+                parts = candidate.split()
+                if parts:
+                    parts[0] = names.get(parts[0], parts[0])
+                candidates.append(" ".join(parts))
+            value = ", ".join(candidates)
+        else:
+            value = names.get(value, value)
+        return '%s="%s"' % (attr, value)
+
+    return _REF.sub(replace, html)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from bibparser import BibEntry
+
+
+_ACCENTS = {
+    '"': "\u0308", "'": "\u0301", "`": "\u0300", "^": "\u0302", "~": "\u0303",
+    "=": "\u0304", ".": "\u0307", "u": "\u0306", "v": "\u030c", "H": "\u030b",
+    "c": "\u0327", "k": "\u0328",
+}
+_LATEX_ACCENT = re.compile(r"""\\(["'`^~=.]|[uvHck](?![A-Za-z]))\s*\{?([A-Za-z])\}?""")
+_LATEX_LETTERS = {r"\ss": "ß", r"\o": "ø", r"\O": "Ø", r"\aa": "å", r"\AA": "Å", r"\ae": "æ", r"\l": "ł", r"\i": "ı"}
+_LATEX_LETTER = re.compile(r"\\(ss|o|O|aa|AA|ae|l|i)(?![A-Za-z])\s?")
+_SPLIT = re.compile(r"[\s.]+")
+
+
+def _is_cjk(text: str) -> bool:
+    return any("\u3040" <= c <= "\u30ff" or "\u3400" <= c <= "\u9fff" for c in text)
+
+
+def latex_to_unicode(name: str) -> str:
+    if "\\" not in name:
+        return name
+    name = _LATEX_ACCENT.sub(lambda m: m.group(2) + _ACCENTS[m.group(1)], name)
+    name = _LATEX_LETTER.sub(lambda m: _LATEX_LETTERS["\\" + m.group(1)], name)
+    return unicodedata.normalize("NFC", name)
+
+
+def canonical_key(name: str) -> str:
+    # "K. M{\"u}ller", "Kei Müller" and "K Muller" share the key "k muller";
+    # Japanese names only lose their inner spaces ("河原塚 健人" -> "河原塚健人").
+    name = unicodedata.normalize("NFKC", latex_to_unicode(name)).replace("{", "").replace("}", "")
+    name = name.strip(" ,;")
+    if _is_cjk(name):
+        return "".join(name.split())
+    name = "".join(c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c))
+    tokens = [t for t in _SPLIT.split(name.lower()) if t]
+    if len(tokens) < 2:
+        return " ".join(tokens)
+    # An initial after a full word ("Y. Asano Y. Kakiuchi", a missing "and")
+    # is not a plain given/family name pair: keep it distinct.
+    first_word = next((i for i, t in enumerate(tokens) if len(t) > 1), len(tokens))
+    if any(len(t) == 1 for t in tokens[first_word:]):
+        return " ".join(tokens)
+    return tokens[0][0] + " " + tokens[-1]
+
+
+def surname_aliases(names: Iterable[str], ja_name: str, en_name: str) -> Dict[str, str]:
+    # AuthorRegistry aliases joining the Japanese and romanized forms of one
+    # person, given their surnames (MakeHTML's ja_name/en_name): every name
+    # containing ja_name -> the first name containing en_name.
+    names = list(names)
+    target = next((name for name in names if en_name in name), None)
+    if target is None:
+        return {}
+    return {name: target for name in names if ja_name in name}
+
+
+class AuthorRegistry:
+    # Interns author name variants to integer IDs. The display name of an ID
+    # is the first variant seen. aliases maps variant -> variant, e.g. a
+    # Japanese name to its romanized form, before any name is interned.
+    def __init__(self, aliases: Optional[Dict[str, str]] = None):
+        self._ids_by_key: Dict[str, int] = {}
+        self._ids_by_raw: Dict[str, int] = {}
+        self._alias_keys: Dict[str, str] = {}
+        self.names: List[str] = []
+        self.variants: List[Set[str]] = []
+        self.entries_by_author: List[List[BibEntry]] = []
+        for variant, target in (aliases or {}).items():
+            self._alias_keys[canonical_key(variant)] = canonical_key(target)
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[BibEntry], aliases: Optional[Dict[str, str]] = None) -> "AuthorRegistry":
+        registry = cls(aliases)
+        for entry in entries:
+            registry.add_entry(entry)
+        return registry
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, raw: str) -> int:
+        author_id = self._ids_by_raw.get(raw)
+        if author_id is not None:
+            return author_id
+        key = canonical_key(raw)
+        key = self._alias_keys.get(key, key)
+        author_id = self._ids_by_key.get(key)
+        if author_id is None:
+            author_id = len(self.names)
+            self._ids_by_key[key] = author_id
+            self.names.append(raw.strip(" ,;"))
+            self.variants.append(set())
+            self.entries_by_author.append([])
+        self._ids_by_raw[raw] = author_id
+        self.variants[author_id].add(raw)
+        return author_id
+
+    def add_entry(self, entry: BibEntry, names: Optional[Iterable[str]] = None) -> Tuple[int, ...]:
+        # names defaults to entry.authors; callers that render a differently
+        # split author string pass their own pieces so that all of them are known.
+        ids = tuple(self.intern(name) for name in (entry.authors if names is None else names))
+        for author_id in set(ids):
+            self.entries_by_author[author_id].append(entry)
+        return ids
+
+    def get(self, raw: str) -> Optional[int]:
+        author_id = self._ids_by_raw.get(raw)
+        if author_id is None:
+            key = canonical_key(raw)
+            author_id = self._ids_by_key.get(self._alias_keys.get(key, key))
+        return author_id
+
+    def display(self, raw: str) -> str:
+        author_id = self.get(raw)
+        return raw if author_id is None else self.names[author_id]
+
+    def ids_where(self, predicate: Callable[[str], bool]) -> Set[int]:
+        # One scan over the distinct variants instead of one per entry.
+        return {author_id for author_id, variants in enumerate(self.variants)
+                if any(predicate(variant) for variant in variants)}
+
+    def entries_of(self, raw: str) -> List[BibEntry]:
+        author_id = self.get(raw)
+        return [] if author_id is None else self.entries_by_author[author_id]
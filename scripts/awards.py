@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from bibparser import BibEntry, DateKey
+
+
+def award_date_key(entry: BibEntry) -> DateKey:
+    # The parsed date field; "2024" gives (2024, 0, 0), which comes after
+    # every dated award of 2024 in the newest-first list. Entries without a
+    # usable date fall back to their year, then to the very end.
+    if entry.date_key is not None:
+        return entry.date_key
+    return (entry.year_num or 0, 0, 0)
+
+
+# The award list items, kept sorted by (date key, html) as they are added.
+# make_pub re-adds every item on each build; unchanged ones stay where they
+# are, so a rebuild only moves the awards that changed. The newest-first
+# list, the newest N and the awards of one year are all slices.
+class AwardIndex:
+    def __init__(self):
+        self._items: List[Tuple[DateKey, str]] = []
+        self._by_id: Dict[Hashable, Tuple[DateKey, str]] = {}
+        self._seen: Set[Hashable] = set()
+
+    def begin(self) -> None:
+        self._seen = set()
+
+    def add(self, item_id: Hashable, key: DateKey, html: str) -> None:
+        self._seen.add(item_id)
+        item = (key, html)
+        previous = self._by_id.get(item_id)
+        if previous == item:
+            return
+        if previous is not None:
+            self._remove(previous)
+        self._by_id[item_id] = item
+        insort(self._items, item)
+
+    def end(self) -> None:
+        # drops the items not added since begin()
+        for item_id in [item_id for item_id in self._by_id if item_id not in self._seen]:
+            self._remove(self._by_id.pop(item_id))
+
+    def _remove(self, item: Tuple[DateKey, str]) -> None:
+        del self._items[bisect_left(self._items, item)]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def top(self, n: Optional[int] = None) -> List[str]:
+        # the html of the newest n awards (all of them by default), newest first
+        items = self._items if n is None else self._items[max(0, len(self._items) - n):] if n > 0 else []
+        return [html for key, html in reversed(items)]
+
+    def in_year(self, year: int) -> List[str]:
+        # a 1-tuple sorts before every item sharing its first element
+        start = bisect_left(self._items, ((year, 0, 0),))
+        stop = bisect_left(self._items, ((year + 1, 0, 0),))
+        return [html for key, html in reversed(self._items[start:stop])]
+
+    def years(self) -> List[int]:
+        return sorted({key[0] for key, html in self._items if key[0]}, reverse=True)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from bibparser import BibEntry
+from bibtable import AuthorshipTable
+from coauthors import CoauthorGraph
+from build_static_charts import _stacked_traces
+
+
+def _stacked_traces_legacy(df: pd.DataFrame, x_col: str, stack_col: str, value_col: str, x_order: List, series_order: List) -> List[Dict]:
+    # The original per-series, per-x filtering implementation, kept as a reference.
+    traces = []
+    for series in series_order:
+        subset = df[df[stack_col] == series]
+        counts = []
+        for x_value in x_order:
+            match = subset[subset[x_col] == x_value]
+            counts.append(int(match[value_col].sum()) if not match.empty else 0)
+        traces.append({"type": "bar", "name": series, "x": x_order, "y": counts})
+    return traces
+
+
+def _all_author_df_legacy(entries: List[BibEntry]) -> pd.DataFrame:
+    # The original row-of-dicts aggregation, kept as a reference.
+    rows = []
+    for entry in entries:
+        for author in entry.authors:
+            rows.append({"year": entry.year_num, "author": author, "count": 1})
+    df = pd.DataFrame(rows)
+    return df.groupby(["year", "author"], as_index=False)["count"].sum()
+
+
+def synthetic_entries(n_entries: int, n_authors: int, seed: int = 0) -> List[BibEntry]:
+    rng = np.random.default_rng(seed)
+    entries = []
+    for i in range(n_entries):
+        entry = BibEntry("ijournal_papers", "article", "synthetic%d" % i)
+        entry.authors = ["Author %d" % a for a in rng.integers(0, n_authors, rng.integers(1, 9))]
+        entry.year_num = int(rng.integers(2005, 2027))
+        entry.venue = "Venue %d" % (i % 40)
+        entries.append(entry)
+    return entries
+
+
+def synthetic_counts(n_rows: int, n_authors: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "year": rng.integers(2005, 2027, n_rows),
+        "author": ["Author %d" % i for i in rng.integers(0, n_authors, n_rows)],
+        "count": 1,
+    })
+    return df.groupby(["year", "author"], as_index=False)["count"].sum()
+
+
+def _time(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="benchmark the chart aggregation and trace building against the legacy implementations")
+    parser.add_argument('--authors', type=int, nargs='+', default=[100, 300, 1000],
+                        help='number of distinct authors (= series) per run')
+    parser.add_argument('--rows', type=int, default=20000,
+                        help='number of synthetic (year, author) records')
+    parser.add_argument('--entries', type=int, default=50000,
+                        help='number of synthetic entries for the aggregation benchmark')
+    args = parser.parse_args()
+
+    entries = synthetic_entries(args.entries, 5000)
+    legacy = _time(_all_author_df_legacy, entries)
+    start = time.perf_counter()
+    table = AuthorshipTable(entries)
+    build = time.perf_counter() - start
+    columnar = _time(table.all_author_counts)
+    print("all-author counts on %d entries: rows-of-dicts %.3f s, table build %.3f s + bincount %.4f s"
+          % (args.entries, legacy, build, columnar))
+    start = time.perf_counter()
+    graph = CoauthorGraph(table)
+    print("co-author graph on %d entries: %d pairs in %.3f s"
+          % (args.entries, graph.n_edges, time.perf_counter() - start))
+    print()
+
+    print("%8s %8s %12s %12s %8s" % ("authors", "rows", "legacy [s]", "pivot [s]", "speedup"))
+    for n_authors in args.authors:
+        df = synthetic_counts(args.rows, n_authors)
+        years = sorted(df["year"].unique().tolist())
+        authors = sorted(df["author"].unique().tolist())
+        kwargs = dict(x_col="year", stack_col="author", value_col="count", x_order=years, series_order=authors)
+        assert _stacked_traces(df, **kwargs) == _stacked_traces_legacy(df, **kwargs)
+        legacy = _time(_stacked_traces_legacy, df, **kwargs)
+        pivot = _time(_stacked_traces, df, **kwargs)
+        print("%8d %8d %12.3f %12.4f %7.0fx" % (n_authors, len(df), legacy, pivot, legacy / pivot))
+
+
+if __name__ == "__main__":
+    main()
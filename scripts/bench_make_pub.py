@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from typing import List
+
+from bibparser import SECTION_KEYS
+from make_html_from_bib import MakeHTML
+
+
+ROBOTS = ["musashi", "kengoro", "kleiyn", "mevius", "cubix", "pr2", "spot"]
+
+
+def synthetic_bib(n_entries: int) -> str:
+    chunks: List[str] = [
+        '@string{RAL = "IEEE Robotics and Automation Letters"}\n',
+        '@string{ICRA2024 = "2024 IEEE International Conference on Robotics and Automation"}\n\n',
+    ]
+    per_section = max(1, n_entries // len(SECTION_KEYS))
+    for section in SECTION_KEYS:
+        chunks.append("% " + section + "\n")
+        venue = "RAL" if "journal" in section else "ICRA2024"
+        for i in range(per_section):
+            year = 2010 + i % 15
+            fields = [
+                "  author={A. Author%d and K. Kawaharazuka and B. Coauthor%d}," % (i % 97, i % 31),
+                "  title={{Synthetic Paper %d on %s}}," % (i, section),
+                "  journal=%s," % venue if "journal" in section else "  booktitle=%s," % venue,
+                "  pages={%d--%d}," % (i, i + 7),
+                "  year=%d," % year,
+                "  date={%d.%d.%d}," % (year, i % 12 + 1, i % 28 + 1),
+                "  doi={10.0000/synthetic.%d}," % i,
+            ]
+            if i % 3 == 0:
+                fields.append("  website={https://example.com/%d/}," % i)
+            if i % 4 == 0:
+                fields.append("  video={https://www.youtube.com/watch?v=vid%d}," % i)
+            if i % 5 == 0:
+                fields.append("  robots={%s}," % ROBOTS[i % len(ROBOTS)])
+            if i % 50 == 0:
+                fields.append("  award={Best Paper Award},")
+            chunks.append("@article{synthetic%s%d,\n%s\n}\n" % (section, i, "\n".join(fields)))
+    return "".join(chunks)
+
+
+def bench(n_entries: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        bib_path = os.path.join(tmp, "synthetic.bib")
+        with open(bib_path, "w", encoding="utf-8") as fh:
+            fh.write(synthetic_bib(n_entries))
+        makeHTML = MakeHTML(bib_path, use_cache=False)
+        makeHTML.parse_bib()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            makeHTML.make_pub()
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="benchmark MakeHTML.make_pub on synthetic bib files")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[6250, 12500, 25000, 50000],
+                        help='number of synthetic entries per run')
+    args = parser.parse_args()
+    print("%10s %10s %14s" % ("entries", "seconds", "us/entry"))
+    for n_entries in args.sizes:
+        elapsed = bench(n_entries)
+        print("%10d %10.3f %14.1f" % (n_entries, elapsed, elapsed / n_entries * 1e6))
+
+
+if __name__ == "__main__":
+    main()
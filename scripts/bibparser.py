@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from pathlib import Path
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+
+# (year, month, day) with 0 for a missing month or day
+DateKey = Tuple[int, int, int]
+
+
+# Bump whenever BibEntry or the parsing rules change so stale caches are ignored.
+PARSER_VERSION = 2
+CACHE_DIRNAME = ".bibcache"
+
+# Order matters: it is the order in which sections are rendered.
+SECTION_KEYS = (
+    "ijournal_papers",
+    "reviewed_iconference",
+    "workshop_abstract",
+    "arxiv_papers",
+    "djournal_papers",
+    "reviewed_dconference",
+    "non_dconference",
+    "invited",
+)
+
+_SECTION_SET = frozenset(SECTION_KEYS)
+
+_TOP = re.compile(r"[@%]")
+_IDENT = re.compile(r"\s*([A-Za-z][\w\-]*)\s*")
+_KEY = re.compile(r"\s*([^,\s}]*)\s*,?")
+_FIELD = re.compile(r"\s*([A-Za-z_][\w\-:.]*)\s*=\s*")
+_BARE = re.compile(r"[^\s,#{}\"]+")
+_CONCAT = re.compile(r"\s*#\s*")
+_SEP = re.compile(r"\s*,?\s*")
+_BRACE = re.compile(r"[{}]")
+_QUOTE_OR_BRACE = re.compile(r"[{}\"]")
+_NEWLINE = re.compile(r"\s*\n\s*")
+_YEAR = re.compile(r"\d{4}")
+_DATE = re.compile(r"\s*(\d{4})(?:[./-](\d{1,2})(?:[./-](\d{1,2}))?)?\s*$")
+_VENUE_YEAR = re.compile(r"^(.*?)(19|20)\d{2}$")
+
+
+class BibSyntaxError(ValueError):
+    def __init__(self, message: str, text: str, pos: int):
+        self.lineno = text.count("\n", 0, pos) + 1
+        super().__init__(f"line {self.lineno}: {message}")
+
+
+class BibEntry:
+    __slots__ = (
+        "section", "entry_type", "key",
+        "author", "authors", "title",
+        "booktitle", "booktitle2", "booktitle3", "venue",
+        "volume", "number", "pages", "year", "year_num", "date", "date_key", "note",
+        "doi", "arxiv", "website", "code", "slide", "video", "howpublished",
+        "robots", "award", "award_personal",
+    )
+
+    def __init__(self, section: Optional[str], entry_type: str, key: str):
+        self.section = section
+        self.entry_type = entry_type
+        self.key = key
+        self.author = None
+        self.authors: List[str] = []
+        self.title = None
+        self.booktitle = None
+        self.booktitle2 = None
+        self.booktitle3 = None
+        self.venue = None
+        self.volume = None
+        self.number = None
+        self.pages = None
+        self.year = None
+        self.year_num: Optional[int] = None
+        self.date = None
+        self.date_key: Optional[DateKey] = None
+        self.note = None
+        self.doi = None
+        self.arxiv = None
+        self.website = None
+        self.code = None
+        self.slide = None
+        self.video = None
+        self.howpublished = None
+        self.robots = None
+        self.award = None
+        self.award_personal = None
+
+    # Mapping-style access so that rendering code can keep using paper["title"]
+    # and "doi" in paper; missing fields are stored as None.
+    def __contains__(self, name: str) -> bool:
+        return getattr(self, name, None) is not None
+
+    def __getitem__(self, name: str):
+        value = getattr(self, name, None)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def get(self, name: str, default=None):
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+    def fingerprint(self) -> str:
+        values = tuple(getattr(self, name) for name in self.__slots__)
+        return hashlib.sha1(repr(values).encode("utf-8")).hexdigest()
+
+    def __repr__(self) -> str:
+        return f"BibEntry({self.section!r}, {self.key!r})"
+
+
+class BibDatabase:
+    __slots__ = ("macros", "entries", "sections")
+
+    def __init__(self):
+        # @string name -> expansion (e.g. "RAL" -> "IEEE Robotics and Automation Letters")
+        self.macros: Dict[str, str] = {}
+        self.entries: List[BibEntry] = []
+        self.sections: Dict[str, List[BibEntry]] = {key: [] for key in SECTION_KEYS}
+
+    def iter_sections(self, keys) -> List[BibEntry]:
+        return [entry for key in keys for entry in self.sections[key]]
+
+
+def _normalize_venue_label(venue: str) -> str:
+    match = _VENUE_YEAR.match(venue)
+    if match:
+        return match.group(1)
+    return venue
+
+
+def parse_date(value: str) -> Optional[DateKey]:
+    # "2024.5.13" -> (2024, 5, 13), "2024" -> (2024, 0, 0), "TBD" -> None
+    match = _DATE.match(value)
+    if match is None:
+        return None
+    return (int(match.group(1)), int(match.group(2) or 0), int(match.group(3) or 0))
+
+
+def _read_braced(text: str, pos: int) -> Tuple[str, int]:
+    # text[pos] == "{"; braces nest, the outermost pair is dropped.
+    depth = 0
+    i = pos
+    while True:
+        match = _BRACE.search(text, i)
+        if match is None:
+            raise BibSyntaxError("unbalanced braces", text, pos)
+        i = match.end()
+        if match.group() == "{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return text[pos + 1:i - 1], i
+
+
+def _read_quoted(text: str, pos: int) -> Tuple[str, int]:
+    # text[pos] == '"'; a quote only terminates the value outside of braces.
+    depth = 0
+    i = pos + 1
+    while True:
+        match = _QUOTE_OR_BRACE.search(text, i)
+        if match is None:
+            raise BibSyntaxError("unterminated string", text, pos)
+        i = match.end()
+        char = match.group()
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+        elif depth == 0:
+            return text[pos + 1:i - 1], i
+
+
+def _read_value(text: str, pos: int, macros: Dict[str, str]) -> Tuple[str, int]:
+    # A lone bare word (journal=RAL) is returned unexpanded so that the venue
+    # fields can render both the macro name and its expansion.
+    parts = []
+    while True:
+        char = text[pos:pos + 1]
+        if char == "{":
+            value, pos = _read_braced(text, pos)
+            parts.append((value, False))
+        elif char == '"':
+            value, pos = _read_quoted(text, pos)
+            parts.append((value, False))
+        else:
+            match = _BARE.match(text, pos)
+            if match is None:
+                raise BibSyntaxError("expected a field value", text, pos)
+            pos = match.end()
+            parts.append((match.group(), True))
+        match = _CONCAT.match(text, pos)
+        if match is None:
+            break
+        pos = match.end()
+    if len(parts) == 1:
+        value = parts[0][0]
+    else:
+        value = "".join(macros.get(part, part) if is_bare else part for part, is_bare in parts)
+    value = value.replace("{", "").replace("}", "")
+    if "\n" in value:
+        value = _NEWLINE.sub(" ", value)
+    return value, pos
+
+
+_PLAIN_FIELDS = frozenset((
+    "title", "volume", "number", "note", "doi", "arxiv",
+    "website", "code", "slide", "video", "howpublished",
+))
+
+
+def _set_field(entry: BibEntry, name: str, value: str, macros: Dict[str, str]) -> None:
+    if name == "author":
+        entry.author = value.replace(" and", ",")
+        entry.authors = [a.strip() for a in entry.author.split(",") if a.strip()]
+    elif name == "journal" or name == "booktitle":
+        if value in macros:
+            expanded = macros[value]
+            entry.booktitle = expanded + " (<b>" + value + "</b>)"
+            entry.booktitle2 = expanded + " (\\textit{\\textbf{" + value + "}})"
+            entry.booktitle3 = expanded
+        else:
+            entry.booktitle = value
+            entry.booktitle2 = value
+            entry.booktitle3 = value
+        entry.venue = _normalize_venue_label(value)
+    elif name == "pages":
+        entry.pages = value.replace("--", "-")
+    elif name == "year":
+        entry.year = value
+        match = _YEAR.search(value)
+        entry.year_num = int(match.group(0)) if match else None
+    elif name == "date":
+        entry.date = value
+        entry.date_key = parse_date(value)
+    elif name == "robots":
+        entry.robots = value.split("+")
+    elif name == "award" or name == "award_personal":
+        awards = getattr(entry, name)
+        if awards is None:
+            setattr(entry, name, [value])
+        else:
+            awards.append(value)
+    elif name in _PLAIN_FIELDS:
+        setattr(entry, name, value)
+
+
+def _skip_comment(text: str, pos: int) -> Tuple[str, int]:
+    end = text.find("\n", pos)
+    if end < 0:
+        end = len(text)
+    return text[pos + 1:end].strip(), end
+
+
+def parse_bib_text(text: str) -> BibDatabase:
+    db = BibDatabase()
+    macros = db.macros
+    section = None
+    pos = 0
+    length = len(text)
+    while pos < length:
+        match = _TOP.search(text, pos)
+        if match is None:
+            break
+        pos = match.start()
+        if match.group() == "%":
+            comment, pos = _skip_comment(text, pos)
+            marker = comment.split(None, 1)[0] if comment else ""
+            if marker in _SECTION_SET:
+                section = marker
+            continue
+
+        match = _IDENT.match(text, pos + 1)
+        if match is None:
+            raise BibSyntaxError("expected an entry type after '@'", text, pos)
+        entry_type = match.group(1).lower()
+        pos = match.end()
+        opener = text[pos:pos + 1]
+        if opener not in ("{", "("):
+            raise BibSyntaxError(f"expected '{{' after @{entry_type}", text, pos)
+        closer = "}" if opener == "{" else ")"
+
+        if entry_type in ("comment", "preamble"):
+            if opener == "{":
+                _, pos = _read_braced(text, pos)
+            else:
+                pos = text.index(")", pos) + 1
+            continue
+
+        if entry_type == "string":
+            match = _FIELD.match(text, pos + 1)
+            if match is None:
+                raise BibSyntaxError("malformed @string", text, pos)
+            value, pos = _read_value(text, match.end(), macros)
+            macros[match.group(1)] = value
+            pos = _SEP.match(text, pos).end()
+            if text[pos:pos + 1] != closer:
+                raise BibSyntaxError("unterminated @string", text, pos)
+            pos += 1
+            continue
+
+        match = _KEY.match(text, pos + 1)
+        entry = BibEntry(section, entry_type, match.group(1))
+        pos = match.end()
+        while True:
+            pos = _SEP.match(text, pos).end()
+            char = text[pos:pos + 1]
+            if char == closer:
+                pos += 1
+                break
+            if char == "%":
+                _, pos = _skip_comment(text, pos)
+                continue
+            match = _FIELD.match(text, pos)
+            if match is None:
+                raise BibSyntaxError(f"malformed field in entry {entry.key!r}", text, pos)
+            value, pos = _read_value(text, match.end(), macros)
+            _set_field(entry, match.group(1).lower(), value, macros)
+
+        db.entries.append(entry)
+        if section is not None:
+            db.sections[section].append(entry)
+    return db
+
+
+def _cache_path(bib_path: Path) -> Path:
+    return bib_path.parent / CACHE_DIRNAME / (bib_path.name + ".pickle")
+
+
+def _read_cache(cache_path: Path) -> Optional[dict]:
+    try:
+        with cache_path.open("rb") as fh:
+            cached = pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(cached, dict) or cached.get("version") != PARSER_VERSION:
+        return None
+    return cached
+
+
+def _write_cache(cache_path: Path, cached: dict) -> None:
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump(cached, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, cache_path)
+    except OSError:
+        # The cache is an optimization only; a read-only checkout still works.
+        pass
+
+
+def load_bib(bib_path, use_cache: bool = True) -> BibDatabase:
+    bib_path = Path(bib_path)
+    if not use_cache:
+        return parse_bib_text(bib_path.read_text(encoding="utf-8"))
+
+    stat = bib_path.stat()
+    cache_path = _cache_path(bib_path)
+    cached = _read_cache(cache_path)
+    if cached is not None and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+        return cached["db"]
+
+    raw = bib_path.read_bytes()
+    digest = hashlib.sha1(raw).hexdigest()
+    if cached is not None and cached["sha1"] == digest:
+        db = cached["db"]
+    else:
+        db = parse_bib_text(raw.decode("utf-8"))
+    _write_cache(cache_path, {
+        "version": PARSER_VERSION,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha1": digest,
+        "db": db,
+    })
+    return db
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from authors import AuthorRegistry
+from bibparser import BibEntry
+
+
+# Above this many possible keys, counting falls back from np.bincount to
+# np.unique so that the dense count array stays small.
+_BINCOUNT_LIMIT = 1 << 24
+
+
+def _encode(values: List[str]) -> Tuple[List[str], np.ndarray]:
+    # Integer codes assigned in sorted order, so sorting by code is sorting by name.
+    labels = sorted(set(values))
+    index = {label: code for code, label in enumerate(labels)}
+    return labels, np.fromiter((index[v] for v in values), dtype=np.int32, count=len(values))
+
+
+def _count(keys: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    if size <= _BINCOUNT_LIMIT:
+        counts = np.bincount(keys, minlength=size)
+        nonzero = np.flatnonzero(counts)
+        return nonzero, counts[nonzero]
+    return np.unique(keys, return_counts=True)
+
+
+class AuthorshipTable:
+    # Columnar view of (entry, author) pairs: authors and venues are integer
+    # codes into sorted label lists, years are int16. One row per entry in
+    # the entry_* arrays, one row per authorship in author_id/author_entry.
+    def __init__(self, entries: Iterable[BibEntry], registry: Optional[AuthorRegistry] = None):
+        entries = list(entries)
+        # Name variants of one person ("K. Okada", "Kei Okada") share a label.
+        self.registry = AuthorRegistry.from_entries(entries) if registry is None else registry
+        display = self.registry.names
+        intern = self.registry.intern
+        years: List[int] = []
+        venues: List[str] = []
+        names: List[str] = []
+        offsets = [0]
+        for entry in entries:
+            years.append(entry.year_num)
+            venues.append(entry.venue or "Unknown")
+            names.extend(display[intern(name)] for name in entry.authors)
+            offsets.append(len(names))
+
+        self.n_entries = len(entries)
+        self.authors, self.author_id = _encode(names)
+        self.venues, self.entry_venue = _encode(venues)
+        self.entry_year = np.array(years, dtype=np.int16)
+        self.year_min = int(self.entry_year.min()) if self.n_entries else 0
+        offsets = np.array(offsets, dtype=np.int64)
+        self.author_entry = np.repeat(np.arange(self.n_entries, dtype=np.int32), np.diff(offsets))
+        self.entry_first_author = self.author_id[offsets[:-1]] if self.n_entries else np.zeros(0, dtype=np.int32)
+        self.author_position = (np.arange(len(names)) - np.repeat(offsets[:-1], np.diff(offsets))).astype(np.int16)
+
+    @property
+    def n_years(self) -> int:
+        return int(self.entry_year.max()) - self.year_min + 1 if self.n_entries else 0
+
+    def author_index(self) -> Dict[str, int]:
+        return {name: code for code, name in enumerate(self.authors)}
+
+    def first_author_counts(self) -> pd.DataFrame:
+        if self.n_entries == 0:
+            return pd.DataFrame(columns=["year", "author", "venue", "count"])
+        n_authors, n_venues = len(self.authors), len(self.venues)
+        year = self.entry_year.astype(np.int64) - self.year_min
+        keys = (year * n_authors + self.entry_first_author) * n_venues + self.entry_venue
+        keys, counts = _count(keys, self.n_years * n_authors * n_venues)
+        keys, venue = np.divmod(keys, n_venues)
+        year, author = np.divmod(keys, n_authors)
+        return pd.DataFrame({
+            "year": year + self.year_min,
+            "author": np.array(self.authors, dtype=object)[author],
+            "venue": np.array(self.venues, dtype=object)[venue],
+            "count": counts.astype(np.int64),
+        })
+
+    def all_author_counts(self) -> pd.DataFrame:
+        if self.n_entries == 0:
+            return pd.DataFrame(columns=["year", "author", "count"])
+        n_authors = len(self.authors)
+        year = self.entry_year[self.author_entry].astype(np.int64) - self.year_min
+        keys, counts = _count(year * n_authors + self.author_id, self.n_years * n_authors)
+        year, author = np.divmod(keys, n_authors)
+        return pd.DataFrame({
+            "year": year + self.year_min,
+            "author": np.array(self.authors, dtype=object)[author],
+            "count": counts.astype(np.int64),
+        })
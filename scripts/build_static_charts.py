@@ -3,204 +3,267 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+import argparse
 import json
 import re
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+from authors import AuthorRegistry, surname_aliases
+from bibparser import SECTION_KEYS as ALL_SECTION_KEYS, BibDatabase, BibEntry, load_bib
+from bibtable import AuthorshipTable
+from coauthors import CoauthorGraph
+from writer import OutputWriter
 
-SECTION_KEYS = {"ijournal_papers", "reviewed_iconference"}
+
+SECTION_KEYS = ("ijournal_papers", "reviewed_iconference")
+HIGHLIGHT_AUTHOR = "K. Kawaharazuka"
+HIGHLIGHT_SURNAMES = ("河原塚", "Kawaharazuka")  # MakeHTML's ja_name, en_name
 OUTPUT_HTML = Path(__file__).resolve().parents[1] / "bib_charts.html"
+BATCH_DIR = Path(__file__).resolve().parents[1] / "charts"
+PLOTLY_CDN = "https://cdn.plot.ly/plotly-2.27.0.min.js"
+
+# Rebuilds the dense traces of a payload from _sparse_payload in the browser.
+SPARSE_DECODER = """    function denseTraces(p) {
+      const traces = p.names.map(name => ({ type: "bar", name: name, x: p.x, y: new Array(p.x.length).fill(0) }));
+      for (let k = 0; k < p.v.length; k++) traces[p.i[k]].y[p.j[k]] = p.v[k];
+      return traces;
+    }
+    for (const key of data.sparse) data[key] = denseTraces(data[key]);
+"""
 
 
-@dataclass
-class BibEntry:
-    authors: List[str]
-    year: int
-    venue: str
-
-
-def _clean_bib_value(text: str) -> str:
-    cleaned = text.strip().rstrip(",")
-    cleaned = cleaned.strip("{}").strip()
-    return cleaned
-
-
-def _normalize_venue_label(venue: str) -> str:
-    match = re.match(r"^(.*?)(19|20)\d{2}$", venue)
-    if match:
-        return match.group(1)
-    return venue
-
-
-def _parse_entry(lines: List[str]) -> BibEntry | None:
-    fields: Dict[str, str] = {}
-    for line in lines:
-        if "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        key = key.strip().lower()
-        value = _clean_bib_value(value)
-        fields[key] = value
-    if "author" not in fields or "year" not in fields:
-        return None
-
-    authors_raw = fields["author"].replace(" and ", ",")
-    authors = [a.strip() for a in authors_raw.split(",") if a.strip()]
-    year_match = re.search(r"\d{4}", fields["year"])
-    venue_value = fields.get("journal") or fields.get("booktitle")
-    venue = _normalize_venue_label(venue_value) if venue_value else "Unknown"
-    if not authors or not year_match:
-        return None
-    return BibEntry(authors=authors, year=int(year_match.group(0)), venue=venue)
-
-
-def load_entries(bib_path: Path) -> List[BibEntry]:
-    entries: List[BibEntry] = []
-    in_section = False
-    current_lines: List[str] = []
-    in_entry = False
-
-    with bib_path.open("r", encoding="utf-8") as fh:
-        for raw_line in fh:
-            line = raw_line.strip()
-            if not line:
-                continue
-            if line.startswith("%"):
-                in_section = any(key in line for key in SECTION_KEYS)
-                continue
-            if not in_section:
-                continue
-
-            if line.startswith("@"):
-                in_entry = True
-                current_lines = []
-                continue
-            if in_entry and line == "}":
-                entry = _parse_entry(current_lines)
-                if entry:
-                    entries.append(entry)
-                in_entry = False
-                current_lines = []
-                continue
-            if in_entry:
-                current_lines.append(line)
-
-    return entries
-
-
-def build_first_author_df(entries: List[BibEntry]) -> pd.DataFrame:
-    rows = []
-    for entry in entries:
-        rows.append({"year": entry.year, "author": entry.authors[0], "venue": entry.venue, "count": 1})
-    if not rows:
-        return pd.DataFrame(columns=["year", "author", "venue", "count"])
-    df = pd.DataFrame(rows)
-    df = df.groupby(["year", "author", "venue"], as_index=False)["count"].sum()
-    return df
-
-
-def build_all_author_df(entries: List[BibEntry]) -> pd.DataFrame:
-    rows = []
-    for entry in entries:
-        for author in entry.authors:
-            rows.append({"year": entry.year, "author": author, "count": 1})
-    if not rows:
-        return pd.DataFrame(columns=["year", "author", "count"])
-    df = pd.DataFrame(rows)
-    df = df.groupby(["year", "author"], as_index=False)["count"].sum()
-    return df
+SECTION_TITLES = {
+    "ijournal_papers": "International Journal",
+    "reviewed_iconference": "International Conference",
+    "workshop_abstract": "Workshop + Abstract",
+    "arxiv_papers": "arXiv",
+    "djournal_papers": "Domestic Journal",
+    "reviewed_dconference": "Reviewed Domestic Conference",
+    "non_dconference": "Domestic Conference",
+    "invited": "Invited Talk",
+}
+
+
+def select_entries(db: BibDatabase, sections: Sequence[str] = SECTION_KEYS) -> List[BibEntry]:
+    return [entry for entry in db.iter_sections(sections) if entry.authors and entry.year_num is not None]
+
+
+def load_entries(bib_path: Path, sections: Sequence[str] = SECTION_KEYS) -> List[BibEntry]:
+    return select_entries(load_bib(bib_path), sections)
+
+
+def _stacked_matrix(df: pd.DataFrame, x_col: str, stack_col: str, value_col: str, x_order: List, series_order: List) -> np.ndarray:
+    # One groupby/unstack pass gives a dense series x x_order count matrix
+    # whose rows are the trace y arrays.
+    if df.empty:
+        return np.zeros((len(series_order), len(x_order)), dtype=np.int64)
+    return (
+        df.groupby([stack_col, x_col])[value_col].sum()
+        .unstack(fill_value=0)
+        .reindex(index=series_order, columns=x_order, fill_value=0)
+        .to_numpy(dtype=np.int64)
+    )
 
 
 def _stacked_traces(df: pd.DataFrame, x_col: str, stack_col: str, value_col: str, x_order: List, series_order: List) -> List[Dict]:
-    traces = []
-    for series in series_order:
-        subset = df[df[stack_col] == series]
-        counts = []
-        for x_value in x_order:
-            match = subset[subset[x_col] == x_value]
-            counts.append(int(match[value_col].sum()) if not match.empty else 0)
-        traces.append({"type": "bar", "name": series, "x": x_order, "y": counts})
-    return traces
+    matrix = _stacked_matrix(df, x_col, stack_col, value_col, x_order, series_order)
+    return [
+        {"type": "bar", "name": series, "x": x_order, "y": counts}
+        for series, counts in zip(series_order, matrix.tolist())
+    ]
 
 
-def _top_n_authors(df: pd.DataFrame, author_col: str, count_col: str, n: int = 30) -> List[str]:
-    totals = df.groupby(author_col, as_index=False)[count_col].sum()
-    totals = totals.sort_values(count_col, ascending=False).head(n)
-    return totals[author_col].tolist()
+def _sparse_payload(df: pd.DataFrame, x_col: str, stack_col: str, value_col: str, x_order: List, series_order: List) -> Dict:
+    # The same chart as _stacked_traces, as (series, x, value) triples of the
+    # non-zero cells only: its size follows the counts, not series x x_order.
+    matrix = _stacked_matrix(df, x_col, stack_col, value_col, x_order, series_order)
+    i, j = np.nonzero(matrix)
+    return {"x": x_order, "names": series_order, "i": i.tolist(), "j": j.tolist(), "v": matrix[i, j].tolist()}
 
 
-def build_html(bib_path: Path) -> str:
-    entries = load_entries(bib_path)
-    df_first = build_first_author_df(entries)
-    df_all = build_all_author_df(entries)
+def _plotly_script(plotly_js: Optional[Path]) -> str:
+    if plotly_js is None:
+        return f"<script src=\"{PLOTLY_CDN}\"></script>"
+    # e.g. the plotly-basic partial bundle, which has every trace type used here
+    source = plotly_js.read_text(encoding="utf-8").replace("</script", "<\\/script")
+    return f"<script>\n{source}\n</script>"
 
-    if df_first.empty:
-        raise RuntimeError("No entries found in ijournal_papers or reviewed_iconference.")
 
-    years = sorted(df_first["year"].unique().tolist())
+def _top_n_authors(df: pd.DataFrame, author_col: str, count_col: str, n: int = 30) -> List[str]:
+    # Ties are broken by name, so the bars do not reshuffle when an
+    # unrelated author is added or removed.
+    totals = df.groupby(author_col, as_index=False)[count_col].sum()
+    totals = totals.sort_values([count_col, author_col], ascending=[False, True]).head(n)
+    return totals[author_col].tolist()
 
-    first_authors = sorted(df_first["author"].unique().tolist())
-    traces_year_by_first = _stacked_traces(
-        df_first,
-        x_col="year",
-        stack_col="author",
-        value_col="count",
-        x_order=years,
-        series_order=first_authors,
-    )
 
-    top_first_authors = _top_n_authors(df_first, "author", "count", n=30)
-    df_first_top = df_first[df_first["author"].isin(top_first_authors)]
-    traces_first_by_author = _stacked_traces(
-        df_first_top,
-        x_col="author",
-        stack_col="year",
-        value_col="count",
-        x_order=top_first_authors,
-        series_order=years,
-    )
+def author_registry(entries: Sequence[BibEntry]) -> AuthorRegistry:
+    # Counts the Japanese and romanized names of the highlighted author as one.
+    names = (name for entry in entries for name in entry.authors)
+    return AuthorRegistry.from_entries(entries, surname_aliases(names, *HIGHLIGHT_SURNAMES))
 
-    top_all_authors = _top_n_authors(df_all, "author", "count", n=30)
-    df_all_top = df_all[df_all["author"].isin(top_all_authors)]
-    traces_all_by_author = _stacked_traces(
-        df_all_top,
-        x_col="author",
-        stack_col="year",
-        value_col="count",
-        x_order=top_all_authors,
-        series_order=years,
-    )
 
-    kk_df = df_first[df_first["author"] == "K. Kawaharazuka"]
+@dataclass
+class ChartData:
+    # Aggregates of one set of sections, shared by every page drawn from it.
+    # Only the per-author charts are computed per page.
+    sections: Tuple[str, ...]
+    source: str
+    table: AuthorshipTable
+    df_first: pd.DataFrame
+    df_all: pd.DataFrame
+    graph: CoauthorGraph
+    years: List[int]
+    _shared: Dict[bool, Dict] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[BibEntry], sections: Sequence[str] = SECTION_KEYS, source: str = "main.bib") -> "ChartData":
+        entries = list(entries)
+        table = AuthorshipTable(entries, author_registry(entries))
+        df_first = table.first_author_counts()
+        df_all = table.all_author_counts()
+
+        if df_first.empty:
+            raise RuntimeError("No entries found in %s." % " or ".join(sections))
+
+        return cls(
+            sections=tuple(sections),
+            source=source,
+            table=table,
+            df_first=df_first,
+            df_all=df_all,
+            graph=CoauthorGraph(table),
+            years=sorted(df_first["year"].unique().tolist()),
+        )
+
+    @property
+    def title(self) -> str:
+        return " + ".join(SECTION_TITLES.get(key, key) for key in self.sections)
+
+    def shared_traces(self, compact: bool = False) -> Dict:
+        traces = self._shared.get(compact)
+        if traces is None:
+            traces = self._shared[compact] = self._build_shared_traces(compact)
+        return traces
+
+    def _build_shared_traces(self, compact: bool) -> Dict:
+        stacked = _sparse_payload if compact else _stacked_traces
+        df_first, df_all, years = self.df_first, self.df_all, self.years
+
+        first_authors = sorted(df_first["author"].unique().tolist())
+        traces_year_by_first = stacked(
+            df_first,
+            x_col="year",
+            stack_col="author",
+            value_col="count",
+            x_order=years,
+            series_order=first_authors,
+        )
+
+        top_first_authors = _top_n_authors(df_first, "author", "count", n=30)
+        df_first_top = df_first[df_first["author"].isin(top_first_authors)]
+        traces_first_by_author = stacked(
+            df_first_top,
+            x_col="author",
+            stack_col="year",
+            value_col="count",
+            x_order=top_first_authors,
+            series_order=years,
+        )
+
+        top_all_authors = _top_n_authors(df_all, "author", "count", n=30)
+        df_all_top = df_all[df_all["author"].isin(top_all_authors)]
+        traces_all_by_author = stacked(
+            df_all_top,
+            x_col="author",
+            stack_col="year",
+            value_col="count",
+            x_order=top_all_authors,
+            series_order=years,
+        )
+
+        top_degree = self.graph.top_by_degree(30)
+        traces_coauthor_degree = [{
+            "type": "bar",
+            "name": "Distinct co-authors",
+            "x": top_degree["author"].tolist(),
+            "y": top_degree["collaborators"].tolist(),
+        }]
+        by_year = self.graph.collaborations_by_year()
+        traces_coauthor_years = [
+            {"type": "bar", "name": "Co-author pairs", "x": by_year["year"].tolist(), "y": by_year["pairs"].tolist()},
+            {"type": "bar", "name": "New pairs", "x": by_year["year"].tolist(), "y": by_year["new_pairs"].tolist()},
+        ]
+        return {
+            "traces_year_by_first": traces_year_by_first,
+            "traces_first_by_author": traces_first_by_author,
+            "traces_all_by_author": traces_all_by_author,
+            "traces_coauthor_degree": traces_coauthor_degree,
+            "traces_coauthor_years": traces_coauthor_years,
+        }
+
+
+def build_html(bib_path: Path, plotly_js: Optional[Path] = None, compact: bool = False,
+               sections: Sequence[str] = SECTION_KEYS, author: str = HIGHLIGHT_AUTHOR) -> str:
+    # plotly_js inlines a local Plotly bundle instead of loading it from the
+    # CDN; compact ships the stacked charts as sparse payloads.
+    data = ChartData.from_entries(load_entries(bib_path, sections), sections, bib_path.name)
+    return render_html(data, author, _plotly_script(plotly_js), compact)
+
+
+def render_html(data: ChartData, author: str, plotly_script: str, compact: bool = False) -> str:
+    stacked = _sparse_payload if compact else _stacked_traces
+    shared = data.shared_traces(compact)
+    display_name = data.table.registry.display(author)
+
+    kk_df = data.df_first[data.df_first["author"] == display_name]
     kk_venues = sorted(kk_df["venue"].unique().tolist())
-    traces_kk = _stacked_traces(
+    traces_kk = stacked(
         kk_df,
         x_col="year",
         stack_col="venue",
         value_col="count",
-        x_order=years,
+        x_order=data.years,
         series_order=kk_venues,
     )
 
+    kk_collaborators = data.graph.top_collaborators(display_name, n=30)
+    traces_kk_collaborators = [{
+        "type": "bar",
+        "name": "Joint papers",
+        "x": [name for name, _ in kk_collaborators],
+        "y": [count for _, count in kk_collaborators],
+    }]
+
     context = {
-        "traces_year_by_first": traces_year_by_first,
-        "traces_first_by_author": traces_first_by_author,
-        "traces_all_by_author": traces_all_by_author,
+        "traces_year_by_first": shared["traces_year_by_first"],
+        "traces_first_by_author": shared["traces_first_by_author"],
+        "traces_all_by_author": shared["traces_all_by_author"],
         "traces_kk": traces_kk,
-        "years": years,
+        "traces_coauthor_degree": shared["traces_coauthor_degree"],
+        "traces_coauthor_years": shared["traces_coauthor_years"],
+        "traces_kk_collaborators": traces_kk_collaborators,
+        "years": data.years,
     }
+    if compact:
+        context["sparse"] = ["traces_year_by_first", "traces_first_by_author", "traces_all_by_author", "traces_kk"]
+    payload = json.dumps(context, ensure_ascii=False, separators=(",", ":") if compact else None)
+    decoder = SPARSE_DECODER if compact else ""
+    source = " + ".join("%% %s" % key for key in data.sections)
 
     return f"""<!doctype html>
 <html lang=\"en\">
 <head>
   <meta charset=\"utf-8\" />
   <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
-  <title>International Journal + International Conference Counts</title>
-  <script src=\"https://cdn.plot.ly/plotly-2.27.0.min.js\"></script>
+  <title>{data.title} Counts</title>
+  {plotly_script}
   <style>
     body {{ font-family: "Helvetica Neue", Arial, sans-serif; margin: 24px; color: #1f1f1f; }}
     h1 {{ font-size: 24px; margin-bottom: 8px; }}
@@ -210,8 +273,8 @@ def build_html(bib_path: Path) -> str:
   </style>
 </head>
 <body>
-  <h1>International Journal + International Conference Counts</h1>
-  <div class=\"note\">Data source: main.bib (% ijournal_papers + % reviewed_iconference)</div>
+  <h1>{data.title} Counts</h1>
+  <div class=\"note\">Data source: {data.source} ({source})</div>
 
   <h2>Counts by Year (First Author)</h2>
   <div id=\"chart-year-first\" class=\"chart\"></div>
@@ -222,12 +285,22 @@ def build_html(bib_path: Path) -> str:
   <h2>Counts by All Authors (Top 30, colored by year)</h2>
   <div id=\"chart-all-author\" class=\"chart\"></div>
 
-  <h2>K. Kawaharazuka: Counts by Year (colored by venue)</h2>
+  <h2>{author}: Counts by Year (colored by venue)</h2>
   <div id=\"chart-kk\" class=\"chart\"></div>
 
-  <script>
-    const data = {json.dumps(context, ensure_ascii=False)};
+  <h2>Co-authorship: Distinct Co-authors (Top 30)</h2>
+  <div class=\"note\">{data.graph.n_edges} co-author pairs over {len(data.table.authors)} authors</div>
+  <div id=\"chart-coauthor-degree\" class=\"chart\"></div>
+
+  <h2>Co-authorship: Collaborations by Year</h2>
+  <div id=\"chart-coauthor-years\" class=\"chart\"></div>
 
+  <h2>{author}: Top Collaborators</h2>
+  <div id=\"chart-kk-collaborators\" class=\"chart\"></div>
+
+  <script>
+    const data = {payload};
+{decoder}
     Plotly.newPlot("chart-year-first", data.traces_year_by_first, {{
       barmode: "stack",
       xaxis: {{ title: "Year", type: "category" }},
@@ -255,17 +328,96 @@ def build_html(bib_path: Path) -> str:
       yaxis: {{ title: "Count" }},
       margin: {{ t: 20 }}
     }}, {{responsive: true}});
+
+    Plotly.newPlot("chart-coauthor-degree", data.traces_coauthor_degree, {{
+      xaxis: {{ title: "Author", type: "category" }},
+      yaxis: {{ title: "Co-authors" }},
+      margin: {{ t: 20 }}
+    }}, {{responsive: true}});
+
+    Plotly.newPlot("chart-coauthor-years", data.traces_coauthor_years, {{
+      barmode: "group",
+      xaxis: {{ title: "Year", type: "category" }},
+      yaxis: {{ title: "Pairs" }},
+      margin: {{ t: 20 }}
+    }}, {{responsive: true}});
+
+    Plotly.newPlot("chart-kk-collaborators", data.traces_kk_collaborators, {{
+      xaxis: {{ title: "Co-author", type: "category" }},
+      yaxis: {{ title: "Joint papers" }},
+      margin: {{ t: 20 }}
+    }}, {{responsive: true}});
   </script>
 </body>
 </html>
 """
 
 
+def page_name(author: str, sections: Sequence[str]) -> str:
+    slug = re.sub(r"\W+", "-", author).strip("-").lower()
+    return "%s--%s.html" % (slug, "+".join(sections))
+
+
+def build_pages(bib_path: Path, authors: Sequence[str], section_sets: Sequence[Sequence[str]], out_dir: Path,
+                plotly_js: Optional[Path] = None, compact: bool = False, jobs: Optional[int] = None) -> OutputWriter:
+    # One parse and one ChartData per section set; each (section set, author)
+    # page then only adds its two per-author charts.
+    db = load_bib(bib_path)
+    plotly_script = _plotly_script(plotly_js)
+    datasets = [ChartData.from_entries(select_entries(db, sections), sections, bib_path.name)
+                for sections in section_sets]
+    for data in datasets:
+        data.shared_traces(compact)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    writer = OutputWriter()
+
+    def write_page(data: ChartData, author: str) -> None:
+        with writer.open(out_dir / page_name(author, data.sections)) as fh:
+            fh.write(render_html(data, author, plotly_script, compact))
+
+    pages = [(data, author) for data in datasets for author in authors]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for future in [executor.submit(write_page, data, author) for data, author in pages]:
+            future.result()
+    return writer
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="build bib_charts.html from main.bib")
+    parser.add_argument('--plotly_js', type=Path, default=None,
+                        help='inline this Plotly bundle (e.g. plotly-basic.min.js) instead of loading it from the CDN')
+    parser.add_argument('--compact', action='store_true',
+                        help='ship the stacked charts as sparse non-zero counts decoded in the browser')
+    parser.add_argument('--offline', type=Path, default=None, metavar='PLOTLY_JS',
+                        help='shorthand for --plotly_js PLOTLY_JS --compact')
+    parser.add_argument('-o', '--output', type=Path, default=OUTPUT_HTML)
+    parser.add_argument('--sections', nargs='+', choices=ALL_SECTION_KEYS, default=list(SECTION_KEYS),
+                        help='bib sections counted together (default: %(default)s)')
+    parser.add_argument('--authors', nargs='+', default=None,
+                        help='batch mode: write one page per author into --batch_dir')
+    parser.add_argument('--per_section', action='store_true',
+                        help='batch mode: also write one page per author for each of --sections alone')
+    parser.add_argument('--batch_dir', type=Path, default=BATCH_DIR)
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='number of pages written in parallel in batch mode')
+    args = parser.parse_args()
+    if args.offline is not None:
+        args.plotly_js, args.compact = args.offline, True
+
     bib_path = Path(__file__).resolve().parents[1] / "main.bib"
-    html = build_html(bib_path)
-    OUTPUT_HTML.write_text(html, encoding="utf-8")
-    print(f"Wrote {OUTPUT_HTML}")
+    if args.authors:
+        section_sets = [tuple(args.sections)]
+        if args.per_section and len(args.sections) > 1:
+            section_sets += [(key,) for key in args.sections]
+        writer = build_pages(bib_path, args.authors, section_sets, args.batch_dir,
+                             plotly_js=args.plotly_js, compact=args.compact, jobs=args.jobs)
+        print(f"{args.batch_dir}: {writer.report()}")
+        return
+
+    html = build_html(bib_path, plotly_js=args.plotly_js, compact=args.compact, sections=args.sections)
+    args.output.write_text(html, encoding="utf-8")
+    print(f"Wrote {args.output}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional
+
+from bibparser import CACHE_DIRNAME, BibEntry
+
+
+STATE_FILENAME = "build_state.json"
+
+
+def file_digest(path) -> str:
+    with open(path, "rb") as fh:
+        return hashlib.sha1(fh.read()).hexdigest()
+
+
+def entries_digest(entries: Iterable[BibEntry]) -> str:
+    h = hashlib.sha1()
+    for entry in entries:
+        h.update(entry.fingerprint().encode())
+    return h.hexdigest()
+
+
+# Remembers, per output file, the digests of its template and of every slot
+# (the ordered entries feeding one fragment) it was last built from, and the
+# other files written with it; the output is stale if one of those is gone.
+class BuildState:
+    def __init__(self, bib_path, config_digest: str):
+        self.path = Path(bib_path).parent / CACHE_DIRNAME / STATE_FILENAME
+        self.config_digest = config_digest
+        self.outputs: Dict[str, Dict] = {}
+        try:
+            with self.path.open("r", encoding="utf-8") as fh:
+                state = json.load(fh)
+            if state.get("config") == config_digest:
+                self.outputs = state.get("outputs", {})
+        except (OSError, ValueError):
+            pass
+
+    def _record(self, base_filename: Optional[str], slots: Dict[str, List[BibEntry]]) -> Dict:
+        return {
+            "base": file_digest(base_filename) if base_filename else None,
+            "slots": {slot: entries_digest(entries) for slot, entries in slots.items()},
+        }
+
+    def changed_slots(self, out_filename: str, base_filename: Optional[str],
+                      slots: Dict[str, List[BibEntry]]) -> Optional[List[str]]:
+        # None means the output is up to date; otherwise the list of slots
+        # whose inputs changed (all of them if the template or file changed).
+        record = self._record(base_filename, slots)
+        previous = self.outputs.get(os.path.abspath(out_filename))
+        if (previous is None or previous["base"] != record["base"] or not os.path.exists(out_filename)
+                or not all(os.path.exists(path) for path in previous.get("extras", ()))):
+            return sorted(record["slots"])
+        changed = [slot for slot, digest in record["slots"].items() if previous["slots"].get(slot) != digest]
+        changed.extend(slot for slot in previous["slots"] if slot not in record["slots"])
+        return sorted(changed) if changed else None
+
+    def update(self, out_filename: str, base_filename: Optional[str], slots: Dict[str, List[BibEntry]],
+               extras: Iterable[str] = ()) -> None:
+        # extras: other files written along with out_filename
+        record = self._record(base_filename, slots)
+        record["extras"] = sorted(os.path.abspath(path) for path in extras)
+        self.outputs[os.path.abspath(out_filename)] = record
+
+    def save(self) -> None:
+        try:
+            self.path.parent.mkdir(exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump({"config": self.config_digest, "outputs": self.outputs}, fh, indent=1, sort_keys=True)
+            os.replace(tmp_name, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bibtable import AuthorshipTable
+
+
+class CoauthorGraph:
+    # Sparse co-authorship graph over the author codes of an AuthorshipTable.
+    # Edges are kept once as (a < b, weight, first year) and once in CSR
+    # form (indptr/indices/weights, both directions) for neighbour queries.
+    def __init__(self, table: AuthorshipTable):
+        self.table = table
+        n_authors = len(table.authors)
+        entry, a, b = self._entry_pairs(table)
+        self.n_pair_papers = len(entry)
+
+        # per-paper collaborations by year, before collapsing into edges
+        pair_years = table.entry_year[entry].astype(np.int64)
+        years, counts = np.unique(pair_years, return_counts=True)
+        self._pairs_per_year = dict(zip(years.tolist(), counts.tolist()))
+
+        keys = a * n_authors + b
+        order = np.argsort(keys, kind="stable")
+        keys, pair_years = keys[order], pair_years[order]
+        edge_keys, first, weight = np.unique(keys, return_index=True, return_counts=True)
+        self.edge_a, self.edge_b = np.divmod(edge_keys, n_authors)
+        self.edge_weight = weight
+        self.edge_first_year = np.minimum.reduceat(pair_years, first) if len(first) else first
+
+        src = np.concatenate([self.edge_a, self.edge_b])
+        dst = np.concatenate([self.edge_b, self.edge_a])
+        w = np.concatenate([weight, weight])
+        order = np.lexsort((dst, src))
+        self.indices = dst[order]
+        self.weights = w[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=n_authors))])
+        self.degree = np.diff(self.indptr)
+        self.strength = np.bincount(src, weights=w, minlength=n_authors).astype(np.int64)
+        # distinct papers with at least one co-author; strength counts a
+        # paper once per co-author on it
+        author_papers = np.unique(np.concatenate([entry * n_authors + a, entry * n_authors + b]))
+        self.coauthored = np.bincount(author_papers % max(n_authors, 1), minlength=n_authors).astype(np.int64)
+        # author name -> code, for lookups by name
+        self.author_codes = table.author_index()
+
+    @staticmethod
+    def _entry_pairs(table: AuthorshipTable) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # All (entry, a, b) with a < b among the authors of each entry,
+        # generated with a vectorized self-join over the authorship rows.
+        row_entry = table.author_entry.astype(np.int64)
+        sizes = np.bincount(row_entry, minlength=table.n_entries)
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        partners = sizes[row_entry]
+        left = np.repeat(np.arange(len(row_entry)), partners)
+        within = np.arange(len(left)) - np.repeat(np.cumsum(partners) - partners, partners)
+        right = starts[row_entry[left]] + within
+        a = table.author_id[left].astype(np.int64)
+        b = table.author_id[right].astype(np.int64)
+        entry = row_entry[left]
+        mask = a < b
+        entry, a, b = entry[mask], a[mask], b[mask]
+        # an author listed twice on one paper must not count the pair twice
+        n_authors = max(len(table.authors), 1)
+        _, unique = np.unique((entry * n_authors + a) * n_authors + b, return_index=True)
+        return entry[unique], a[unique], b[unique]
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.edge_weight)
+
+    def adjacency(self):
+        # scipy is not a dependency of the scripts; build the matrix on demand.
+        from scipy.sparse import csr_matrix
+        n_authors = len(self.table.authors)
+        return csr_matrix((self.weights, self.indices, self.indptr), shape=(n_authors, n_authors))
+
+    def degree_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "author": self.table.authors,
+            "collaborators": self.degree.astype(np.int64),
+            "coauthored": self.coauthored,
+        })
+
+    def top_by_degree(self, n: int = 30) -> pd.DataFrame:
+        df = self.degree_frame()
+        return df.sort_values(["collaborators", "coauthored", "author"], ascending=[False, False, True]).head(n)
+
+    def top_collaborators(self, author: str, n: int = 30) -> List[Tuple[str, int]]:
+        code = self.author_codes.get(author)
+        if code is None:
+            return []
+        start, end = self.indptr[code], self.indptr[code + 1]
+        neighbours, weights = self.indices[start:end], self.weights[start:end]
+        order = np.lexsort((neighbours, -weights))[:n]
+        return [(self.table.authors[neighbours[i]], int(weights[i])) for i in order]
+
+    def collaborations_by_year(self) -> pd.DataFrame:
+        # pairs: co-authored (paper, pair) occurrences in that year;
+        # new_pairs: pairs of authors collaborating for the first time.
+        years = sorted(set(self._pairs_per_year) | set(self.edge_first_year.tolist()))
+        new_years, new_counts = np.unique(self.edge_first_year, return_counts=True)
+        new_pairs = dict(zip(new_years.tolist(), new_counts.tolist()))
+        return pd.DataFrame({
+            "year": years,
+            "pairs": [self._pairs_per_year.get(year, 0) for year in years],
+            "new_pairs": [new_pairs.get(year, 0) for year in years],
+        })
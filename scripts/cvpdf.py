@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import List, Optional, Tuple
+
+from bibparser import CACHE_DIRNAME
+from writer import OutputWriter
+
+
+CACHE_SUBDIR = "cv"
+# Same steps as cv/Makefile.
+TOOLCHAIN = (
+    ("platex", "-interaction=nonstopmode", "-halt-on-error", "main.tex"),
+    ("dvipdfmx", "main"),
+)
+TIMEOUT = 300
+# PDFs of this many recent inputs are kept, so reverting a change is free.
+MAX_CACHED = 4
+
+
+def tex_digest(tex: str) -> str:
+    # The generated main.tex is cv/base.tex with the journal and proceedings
+    # lists spliced in, so its text covers every input of the PDF.
+    h = hashlib.sha1()
+    h.update(repr(TOOLCHAIN).encode("utf-8"))
+    h.update(tex.encode("utf-8"))
+    return h.hexdigest()
+
+
+def missing_tools() -> List[str]:
+    return [step[0] for step in TOOLCHAIN if shutil.which(step[0]) is None]
+
+
+# Builds the CV PDF from the generated main.tex on a background thread and
+# copies it to `target`. PDFs are cached by tex_digest, so the LaTeX
+# toolchain only runs when the tex text changed.
+class CvPdf:
+    def __init__(self, bib_path, cv_dir, target, writer: Optional[OutputWriter] = None):
+        self.cache_dir = Path(bib_path).parent / CACHE_DIRNAME / CACHE_SUBDIR
+        self.cv_dir = Path(cv_dir).resolve()
+        self.target = Path(target)
+        self.writer = writer or OutputWriter()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def start(self, tex: str) -> Future:
+        # The future's result is (message, whether target was rewritten).
+        return self._executor.submit(self._build, tex)
+
+    def start_if_missing(self, tex_path) -> Optional[Future]:
+        # For an up-to-date main.tex: builds (or installs from the cache)
+        # the pdf only if the cache has none for this text or the target is
+        # not the cached pdf.
+        try:
+            tex = Path(tex_path).read_text(encoding="utf-8")
+        except OSError:
+            return None
+        cached = self.cache_dir / (tex_digest(tex) + ".pdf")
+        if cached.exists() and self.target.exists() and self.target.stat().st_size == cached.stat().st_size:
+            return None
+        return self.start(tex)
+
+    def _build(self, tex: str) -> Tuple[str, bool]:
+        digest = tex_digest(tex)
+        cached = self.cache_dir / (digest + ".pdf")
+        if cached.exists():
+            cached.touch()
+            return self._install(cached, "cv: pdf from cache")
+        missing = missing_tools()
+        if missing:
+            return "cv: %s not found; %s left as is" % (", ".join(missing), self.target), False
+        with tempfile.TemporaryDirectory() as tmp:
+            # A scratch directory keeps cv/ free of .aux/.dvi/.log files and
+            # away from the main.tex the build is writing concurrently; cv/
+            # stays on the search path for anything base.tex pulls in.
+            (Path(tmp) / "main.tex").write_text(tex, encoding="utf-8")
+            env = dict(os.environ, TEXINPUTS=str(self.cv_dir) + os.pathsep + os.environ.get("TEXINPUTS", ""))
+            for step in TOOLCHAIN:
+                try:
+                    result = subprocess.run(step, cwd=tmp, env=env, stdin=subprocess.DEVNULL,
+                                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=TIMEOUT)
+                except (OSError, subprocess.TimeoutExpired) as e:
+                    return "cv: %s failed: %s" % (step[0], e), False
+                if result.returncode != 0:
+                    log = result.stdout.decode("utf-8", errors="replace").strip().splitlines()
+                    return "cv: %s failed:\n%s" % (step[0], "\n".join(log[-15:])), False
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write((Path(tmp) / "main.pdf").read_bytes())
+            os.replace(tmp_name, cached)
+        self._prune()
+        return self._install(cached, "cv: built pdf")
+
+    def _install(self, cached: Path, message: str) -> Tuple[str, bool]:
+        written = len(self.writer.written)
+        self.writer.write_bytes(self.target, cached.read_bytes())
+        changed = len(self.writer.written) > written
+        return "%s -> %s%s" % (message, self.target, "" if changed else " (unchanged)"), changed
+
+    def _prune(self) -> None:
+        pdfs = sorted(self.cache_dir.glob("*.pdf"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for path in pdfs[MAX_CACHED:]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
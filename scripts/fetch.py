@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import mimetypes
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar, Union
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+
+USER_AGENT = "Mozilla/5.0 (compatible; make_html_from_bib)"
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def fetch(url: str, timeout: float = 10.0, limit: Optional[int] = None) -> Optional[Tuple[bytes, str, str]]:
+    # (body, final url after redirects, charset) or None on any failure;
+    # limit caps how much of the body is read.
+    try:
+        with urlopen(Request(url, headers={"User-Agent": USER_AGENT}), timeout=timeout) as response:
+            data = response.read() if limit is None else response.read(limit)
+            return data, response.geturl(), response.headers.get_content_charset() or "utf-8"
+    except (URLError, OSError, ValueError):
+        return None
+
+
+def fetch_all(func: Callable[[T], R], items: Iterable[T], concurrency: int = 8) -> Dict[T, R]:
+    # Runs the blocking func(item) for every item from asyncio, at most
+    # `concurrency` at a time.
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(item):
+            async with semaphore:
+                return item, await asyncio.to_thread(func, item)
+
+        return dict(await asyncio.gather(*(one(item) for item in items)))
+
+    return asyncio.run(run())
+
+
+# A local HTTP server serving fixed responses, standing in for remote sites
+# when checking a fetching stage without network access.
+@contextmanager
+def stand_in_server(pages: Dict[str, Union[str, bytes]], delay: float = 0.0) -> Iterator[str]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            page = pages.get(self.path)
+            if page is None:
+                self.send_error(404)
+                return
+            if isinstance(page, str):
+                body, content_type = page.encode("utf-8"), "text/html; charset=utf-8"
+            else:
+                body, content_type = page, mimetypes.guess_type(self.path)[0] or "application/octet-stream"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield "http://127.0.0.1:%d" % server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
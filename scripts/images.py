@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from bibparser import CACHE_DIRNAME
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow is optional: without it pages keep the original images
+    Image = None
+    features = None
+
+
+MANIFEST_FILENAME = "images.json"
+# (mtime_ns, size, sha1) per source image; local, unlike the manifest,
+# since a checkout gives every file a new mtime.
+STAT_CACHE_FILENAME = "images-stat.json"
+VARIANT_DIRNAME = "resized"
+VARIANT_WIDTHS = (480, 960, 1440)
+# The robot and portrait images are shown at most about 960px wide.
+SIZES = "(max-width: 960px) 100vw, 960px"
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp", "png": "image/png", "jpeg": "image/jpeg"}
+SAVE_OPTIONS = {
+    "avif": {"quality": 60},
+    "webp": {"quality": 80, "method": 6},
+    "png": {"optimize": True},
+    "jpeg": {"quality": 85, "optimize": True, "progressive": True},
+}
+
+_IMG_TAG = re.compile(r'<img\s+src="(static/[^"]+\.(?:png|jpe?g))"([^>]*)>', re.IGNORECASE)
+
+
+def available_formats() -> Tuple[str, ...]:
+    # Modern formats this Pillow build can encode, best first.
+    if Image is None:
+        return ()
+    formats = []
+    for name in ("avif", "webp"):
+        try:
+            if features.check_module(name):
+                formats.append(name)
+        except ValueError:  # Pillow too old to know the module
+            pass
+    return tuple(formats)
+
+
+def find_images(html_texts: Iterable[str]) -> List[str]:
+    return sorted({match.group(1) for text in html_texts for match in _IMG_TAG.finditer(text)})
+
+
+def _sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _render_variants(root: str, src: str, widths: Sequence[int], formats: Sequence[str]) -> Dict:
+    # Runs in a worker process. Writes <stem>-<width>w.<ext> for every width
+    # below the original one, in each modern format plus the source format.
+    path = Path(root) / src
+    out_dir = path.parent / VARIANT_DIRNAME
+    out_dir.mkdir(exist_ok=True)
+    with Image.open(path) as image:
+        image.load()
+        source_format = "jpeg" if image.format == "JPEG" else "png"
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+        width, height = image.size
+        variants = []
+        for target in sorted(widths):
+            if target >= width:
+                continue
+            resized = image.resize((target, round(height * target / width)), Image.LANCZOS)
+            for fmt in tuple(formats) + (source_format,):
+                out = out_dir / ("%s-%dw.%s" % (path.stem, target, "jpg" if fmt == "jpeg" else fmt))
+                fd, tmp_name = tempfile.mkstemp(dir=out_dir, prefix="." + out.name + ".", suffix=".tmp")
+                with os.fdopen(fd, "wb") as fh:
+                    (resized.convert("RGB") if fmt == "jpeg" else resized).save(fh, format=fmt.upper(), **SAVE_OPTIONS[fmt])
+                os.replace(tmp_name, out)
+                variants.append({"path": out.relative_to(root).as_posix(), "width": target, "format": fmt})
+    return {"width": width, "height": height, "format": source_format, "variants": variants}
+
+
+# Remembers, per source image (path relative to the site root), the sha1 it
+# was processed from and the variants written for it. The manifest lives
+# next to the variants and is committed with them, so a checkout without
+# Pillow still serves the variants. A source is only hashed again when its
+# mtime or size differs from the stat cache, as with the parsed bib cache.
+class ImageVariants:
+    def __init__(self, root, widths: Sequence[int] = VARIANT_WIDTHS):
+        self.root = Path(root)
+        self.manifest_path = self.root / "static" / VARIANT_DIRNAME / MANIFEST_FILENAME
+        self.stat_cache_path = self.root / CACHE_DIRNAME / STAT_CACHE_FILENAME
+        self.settings = {"widths": list(widths), "formats": list(available_formats())}
+        self.entries: Dict[str, Dict] = {}
+        try:
+            with self.manifest_path.open("r", encoding="utf-8") as fh:
+                cached = json.load(fh)
+            self.entries = cached["images"]
+            self.cached_settings = cached["settings"]
+        except (OSError, ValueError, KeyError):
+            self.cached_settings = None
+        self.stats: Dict[str, List] = {}
+        self._stats_changed = False
+        try:
+            with self.stat_cache_path.open("r", encoding="utf-8") as fh:
+                self.stats = json.load(fh)
+        except (OSError, ValueError):
+            pass
+
+    def _digest(self, src: str) -> Optional[str]:
+        path = self.root / src
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        cached = self.stats.get(src)
+        if cached is not None and cached[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return cached[2]
+        digest = _sha1(path)
+        self.stats[src] = [stat.st_mtime_ns, stat.st_size, digest]
+        self._stats_changed = True
+        return digest
+
+    def _is_current(self, src: str) -> bool:
+        entry = self.entries.get(src)
+        if entry is None or self._digest(src) != entry["sha1"]:
+            return False
+        return all((self.root / variant["path"]).exists() for variant in entry["variants"])
+
+    def manifest(self, sources: Iterable[str], process: bool = False, jobs: Optional[int] = None) -> Dict[str, Dict]:
+        # src -> {"width", "height", "format", "variants"} for every source
+        # with up-to-date variants; with process=True stale ones are rebuilt first.
+        sources = list(sources)
+        if process and Image is not None and self.cached_settings != self.settings:
+            self.entries = {}
+        stale = [src for src in sources if not self._is_current(src)]
+        if process and stale:
+            if Image is None:
+                print("images: Pillow is not installed; keeping the original images")
+            else:
+                widths, formats = self.settings["widths"], self.settings["formats"]
+                with ProcessPoolExecutor(max_workers=jobs) as executor:
+                    futures = [executor.submit(_render_variants, str(self.root), src, widths, formats) for src in stale]
+                    for src, future in zip(stale, futures):
+                        entry = future.result()
+                        entry["sha1"] = self._digest(src)
+                        self.entries[src] = entry
+                self.cached_settings = self.settings
+                print("images: processed %d of %d images (%s)" % (len(stale), len(sources), ", ".join(formats) or "no modern formats"))
+                stale = []
+                self._save()
+        self._save_stats()
+        return {src: self.entries[src] for src in sources if src not in stale and src in self.entries}
+
+    def _save(self) -> None:
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.manifest_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump({"settings": self.cached_settings, "images": self.entries}, fh, indent=1, sort_keys=True)
+            os.replace(tmp_name, self.manifest_path)
+        except OSError:
+            pass
+
+    def _save_stats(self) -> None:
+        if not self._stats_changed:
+            return
+        try:
+            self.stat_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.stat_cache_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(self.stats, fh, sort_keys=True)
+            os.replace(tmp_name, self.stat_cache_path)
+            self._stats_changed = False
+        except OSError:
+            pass
+
+
+def _srcset(entry: Dict, fmt: str, original: Optional[str] = None) -> str:
+    candidates = ["%s %dw" % (variant["path"], variant["width"]) for variant in entry["variants"] if variant["format"] == fmt]
+    if original is not None:
+        candidates.append("%s %dw" % (original, entry["width"]))
+    return ", ".join(candidates)
+
+
+def add_srcset(html: str, manifest: Dict[str, Dict]) -> str:
+    # <img src="static/x.png" ...> becomes a <picture> offering the AVIF and
+    # WebP variants, with the downscaled originals as the <img> srcset.
+    def replace(match):
+        src, attrs = match.group(1), match.group(2)
+        entry = manifest.get(src)
+        if entry is None or not entry["variants"] or "srcset=" in attrs:
+            return match.group(0)
+        sources = "".join(
+            '<source type="%s" srcset="%s" sizes="%s">' % (MIME_TYPES[fmt], _srcset(entry, fmt), SIZES)
+            for fmt in MIME_TYPES
+            if fmt != entry["format"] and any(variant["format"] == fmt for variant in entry["variants"])
+        )
+        img = '<img src="%s" srcset="%s" sizes="%s"%s>' % (src, _srcset(entry, entry["format"], src), SIZES, attrs)
+        return "<picture>" + sources + img + "</picture>"
+
+    return _IMG_TAG.sub(replace, html)
@@ -1,35 +1,173 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import io
+import os
 import re
+import sys
 import time
+import json
+import hashlib
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from html import escape
+from pathlib import Path
+from typing import Optional, Tuple
+
+from assets import fingerprint, local_refs, rewrite_refs
+from awards import AwardIndex, award_date_key
+from authors import AuthorRegistry, surname_aliases
+from bibparser import PARSER_VERSION, SECTION_KEYS, load_bib
+from buildstate import BuildState
+from cvpdf import CvPdf
+from images import ImageVariants, add_srcset, find_images
+from searchindex import build_search_index, dump_search_index
+from thumbnails import ThumbnailCache, ThumbnailSprites, fetch_thumbnails, sprite_classes, sprite_css, video_id
+from ogimage import OgImageCache, resolve_og_images
+from template import load_template
+from watcher import watch
+from writer import OutputWriter
+
+
+HTML_HEADER = "<!-- This file is automatically generated. Do not modify -->\n"
+TEX_HEADER = "%This file is automatically generated. Do not modify\n"
+
+# (field, html prefix, link label)
+LINKS = (
+    ("doi", "https://doi.org/", "[Paper Link]"),
+    ("arxiv", "", "[Arxiv Link]"),
+    ("website", "", "[Project Page]"),
+    ("code", "", "[Source Code]"),
+    ("slide", "", "[Slide]"),
+    ("video", "", "[Video]"),
+)
+INVITED_LINKS = (
+    ("website", "", "[Website]"),
+    ("slide", "", "[Slide]"),
+    ("video", "", "[Video]"),
+)
+
+# (field, prefix) appended after the venue, shared by the HTML and TeX renderers
+JOURNAL_FIELDS = (("volume", ", vol. "), ("number", ", no. "), ("pages", ", pp. "), ("year", ", "))
+PROCEEDINGS_FIELDS = (("pages", ", pp. "), ("year", ", "))
+BOLD_NOTE = (("note", ", (<b>", "</b>)"),)
+
+# --search: the index is only fetched by search.js once the box is used.
+SEARCH_HTML = """<div class="mt-3 mb-3">
+          <input type="search" id="pub-search" class="form-control" data-index="search-index.json"
+                 placeholder="Search publications (title, author, venue, robot, year)" aria-label="Search publications">
+          <ol id="pub-search-results" class="mt-2"></ol>
+        </div>
+        <script src="search.js" defer></script>
+"""
+
+# --shard_pub: loads a year of a section when it is opened (the newest one
+# is open and loads when scrolled into view), or the whole section on "Show all".
+PUB_SHARD_SCRIPT = """<script>
+(function() {
+  function fill(target, url) {
+    fetch(url).then(function(r) { return r.text(); }).then(function(html) { target.innerHTML = html; });
+  }
+  function load(details) {
+    if (details.dataset.loaded) return;
+    details.dataset.loaded = "1";
+    fill(details.querySelector("ol"), details.dataset.shard);
+  }
+  var observer = new IntersectionObserver(function(entries) {
+    entries.forEach(function(entry) {
+      if (entry.isIntersecting) { load(entry.target); observer.unobserve(entry.target); }
+    });
+  }, {rootMargin: "400px"});
+  document.querySelectorAll("details.pub-year").forEach(function(details) {
+    details.addEventListener("toggle", function() { if (details.open) load(details); });
+    if (details.open) observer.observe(details);
+  });
+  document.querySelectorAll("a.pub-all").forEach(function(link) {
+    link.addEventListener("click", function(event) {
+      event.preventDefault();
+      var section = link.closest(".pub-section");
+      section.innerHTML = "<ol></ol>";
+      fill(section.querySelector("ol"), link.getAttribute("href"));
+    });
+  });
+})();
+</script>
+"""
+
+
+@dataclass(frozen=True)
+class SectionSpec:
+    key: str
+    heading: str
+    venue: Optional[str] = ", <i>"  # None: no venue column (arXiv)
+    fields: Tuple = JOURNAL_FIELDS
+    pre_venue: Tuple = ()  # (field, prefix, suffix) before the venue
+    post_award: Tuple = BOLD_NOTE  # (field, prefix, suffix) after the awards
+    awards: bool = True
+    award_note: bool = False  # append the note to entries of the award list
+    highlight_ja: bool = False  # also highlight ja_name, not only en_name
+    links: Tuple = LINKS
+    linked: bool = False  # feeds projects.html, videos.html and robots.html
+    card_venue: Optional[str] = None  # project card subtitle, booktitle if None
+    tex: Optional[str] = None  # "journal" / "proceedings" section of the CV
+    jst: Optional[str] = None  # "journal" / "conference" row layout
+    jsps: Optional[str] = None  # "journal" / "conference" CSV
+    invited: str = "0"
+    international: str = "0"
+
+
+SECTION_SPECS = (
+    SectionSpec("ijournal_papers", "<h3> International Journal Papers </h3>",
+                linked=True, tex="journal", jst="journal", jsps="journal"),
+    SectionSpec("reviewed_iconference", "<h3> International Conference Proceedings (Peer Reviewed) </h3>",
+                venue=", in <i>", fields=PROCEEDINGS_FIELDS,
+                linked=True, tex="proceedings", jst="conference", jsps="conference", international="1"),
+    SectionSpec("workshop_abstract", "<h3> International Workshop, Extended Abstract, etc. </h3>",
+                award_note=True, jst="journal", jsps="conference", international="1"),
+    SectionSpec("arxiv_papers", "<h3> arXiv </h3>",
+                venue=None, fields=(("howpublished", ", "), ("year", ", ")), awards=False,
+                links=LINKS[1:], linked=True, card_venue="arXiv"),
+    SectionSpec("djournal_papers", "<h3> Domestic Journal Papers </h3>",
+                highlight_ja=True, jst="journal", jsps="journal"),
+    SectionSpec("reviewed_dconference", "<h3> Domestic Conference Proceedings (Peer Reviewed) </h3>",
+                venue=", in <i>", fields=PROCEEDINGS_FIELDS, highlight_ja=True, jst="conference", jsps="conference"),
+    SectionSpec("non_dconference", "<h3> Domestic Conference Proceedings (No Reviewed) </h3>",
+                venue=", in <i>", fields=(("pages", ", "), ("year", ", ")), highlight_ja=True,
+                jst="conference", jsps="conference"),
+    SectionSpec("invited", "<h3> Invited Talks, Books, etc.</h3>",
+                venue=", in <i>", fields=(), pre_venue=(("note", ", ", ""),), post_award=(("date", ", ", ""),),
+                highlight_ja=True, links=INVITED_LINKS, jst="conference", jsps="conference", invited="1"),
+)
 
 
 class MakeHTML:
-    def __init__(self, bibtex_filename):
-        self.bib = open(bibtex_filename, "r")
+    def __init__(self, bibtex_filename, use_cache=True):
+        self.bibtex_filename = bibtex_filename
+        self.use_cache = use_cache
+        self.writer = OutputWriter()
         self.ja_name = "河原塚"  # no space
         self.en_name = "Kawaharazuka"  # no space
 
         self.conference_name = {}
-        self.state = None
-        self.current = {}
-        # keyはuniqであり, かつ包含関係があってはならない. aとabとかはダメ
-        self.papers = {"ijournal_papers": [],
-                       "reviewed_iconference": [],
-                       "workshop_abstract": [],
-                       "arxiv_papers": [],
-                       "djournal_papers": [],
-                       "reviewed_dconference": [],
-                       "non_dconference": [],
-                       "invited": []}
+        self.papers = {key: [] for key in SECTION_KEYS}
+        self.awards = AwardIndex()  # kept across rebuilds in watch mode
+        self.og_images = {}
+        self.shard_dir = None  # e.g. "pub": index.html only gets a skeleton
+        self.search = False  # write search-index.json next to index.html
+        self.image_variants = {}
+        self.asset_names = {}
+        self.video_sprites = {}  # video id -> sprite sheet tile, see thumbnails.py
+        self.cv_pdf = None  # CvPdf: build the CV pdf alongside the html
+        # output file -> the other files its integrate method wrote (search
+        # index, shards), so that deleting one of them makes it stale
+        self.extra_outputs = {}
 
         self.project_template = """
           <div class='col-md-4 mb-4'>
             <a href='{website_url}' target='_blank' rel='noopener noreferrer' class='text-decoration-none'>
               <div class='card pt-3 pb-3 ps-3 pe-3 ' id='{card_name}'>
-                <img class='card-img-top' alt='{card_title}' loading='lazy' decoding='async'>
+                <img class='card-img-top'{card_src} alt='{card_title}' loading='lazy' decoding='async'>
                 <div class='card-body'>
                   <h5 class='card-title'>{card_title}</h5>
                   <p class='card-text'>{card_text}</p>
@@ -37,13 +175,15 @@ class MakeHTML:
               </div>
             </a>
           </div>
-
+{card_script}        """
+        # og:image の解決できなかったカードだけブラウザで取得する
+        self.project_script_template = """
           <script>
             $(document).ready(function() {{
               setCardImage('#{card_name}', '{website_url}');
             }});
           </script>
-        """
+"""
 
         self.video_template = """
         <div class="col-md-6 mb-4">
@@ -52,9 +192,7 @@ class MakeHTML:
               <h5 class="card-title">{video_title}</h5>
             </div>
             <div class="video-wrapper" onclick="loadVideo(this)">
-              <img loading="lazy" decoding="async" class="video-thumbnail"
-                   src="https://img.youtube.com/vi/{video_id}/hqdefault.jpg" 
-                   alt="{video_title}">
+              {thumbnail}
               <div class="play-button">
                 <div class="play-icon"></div>
               </div>
@@ -62,114 +200,118 @@ class MakeHTML:
           </div>
         </div>
         """
+        self.video_thumbnail_template = """<img loading="lazy" decoding="async" class="video-thumbnail"
+                   src="https://img.youtube.com/vi/{video_id}/hqdefault.jpg" 
+                   alt="{video_title}">"""
+        # スプライトシートにまとめたサムネイル (--video_sprites)
+        self.video_sprite_template = """<div class="video-thumbnail {sprite_class}" data-thumb="{video_id}" role="img" aria-label="{video_title}"></div>"""
 
     def parse_bib(self):
-        for line in self.bib:
-            if line == "\n":
-                continue
-            if "@string" in line:
-                name = line.split('{')[1].split(' ')[0]
-                conference_name = line.split('"')[1]
-                self.conference_name[name] = conference_name
-                continue
-            is_continue = False
-            for k in self.papers.keys():
-                if k in line:
-                    is_continue = True
-                    self.state = k
-            if is_continue:
-                continue
-
-            if line == "}\n":
-                self.papers[self.state].append(self.current)
-                self.current = {}
-            else:
-                if "@" in line[0]:
-                    self.current["key"] = line.split('{')[1].split(',')[0]
-                    continue
-                name = line.split("=")[0]
-                content = "=".join(line.split("=")[1:]).replace("{", "").replace("}", "").replace("\n", "")
-                content = content[:-1] if content[-1] == ',' else content
-                if "author" in name:
-                    self.current["author"] = content.replace(" and", ",")
-                    continue
-                if ("title" in name) and (not ("booktitle" in name)):
-                    self.current["title"] = content
-                    continue
-                if ("journal" in name) or ("booktitle" in name):
-                    if content in self.conference_name:
-                        self.current["booktitle"] = self.conference_name[content] + " (<b>" + content + "</b>)"
-                        self.current["booktitle2"] = self.conference_name[content] + " (\\textit{\\textbf{" + content + "}})"
-                        self.current["booktitle3"] = self.conference_name[content]
-                    else:
-                        self.current["booktitle"] = content
-                        self.current["booktitle2"] = content
-                        self.current["booktitle3"] = content
-                    continue
-                if "volume" in name:
-                    self.current["volume"] = content
-                    continue
-                if "number" in name:
-                    self.current["number"] = content
-                    continue
-                if "pages" in name:
-                    self.current["pages"] = content.replace("--", "-")
-                    continue
-                if "year" in name:
-                    self.current["year"] = content
-                    continue
-                if "award_personal" in name:
-                    if "award_personal" not in self.current:
-                        self.current["award_personal"] = []
-                    self.current["award_personal"].append(content)
-                    continue
-                if "award" in name:
-                    if "award" not in self.current:
-                        self.current["award"] = []
-                    self.current["award"].append(content)
-                    continue
-                if "note" in name:
-                    self.current["note"] = content
-                    continue
-                if "date" in name:
-                    self.current["date"] = content
-                    continue
-                if "doi" in name:
-                    self.current["doi"] = content
-                    continue
-                if "arxiv" in name:
-                    self.current["arxiv"] = content
-                    continue
-                if "website" in name:
-                    self.current["website"] = content
-                    continue
-                if "code" in name:
-                    self.current["code"] = content
-                    continue
-                if "slide" in name:
-                    self.current["slide"] = content
-                    continue
-                if "video" in name:
-                    self.current["video"] = content
-                    continue
-                if "howpublished" in name:
-                    self.current["howpublished"] = content
-                    continue
-                if "robots" in name:
-                    self.current["robots"] = content.split("+")
-                    continue
+        db = load_bib(self.bibtex_filename, use_cache=self.use_cache)
+        self.conference_name = db.macros
+        self.papers = db.sections
+        # Highlighting becomes a set lookup per author instead of substring
+        # scans; only the distinct name variants are scanned, once.
+        # The Japanese and romanized names of the owner share one ID.
+        names = [paper.author.split(", ") if paper.author else [] for paper in db.entries]
+        self.registry = AuthorRegistry(surname_aliases(
+            (name for split in names for name in split), self.ja_name, self.en_name))
+        for paper, split in zip(db.entries, names):
+            self.registry.add_entry(paper, split)
+        self.highlight_ids = {
+            False: self.registry.ids_where(lambda name: self.en_name in name),
+            True: self.registry.ids_where(lambda name: (self.ja_name in name) or (self.en_name in name)),
+        }
+
+    def websites(self):
+        return [paper["website"] for spec in SECTION_SPECS if spec.linked
+                for paper in self.papers[spec.key] if "website" in paper]
+
+    def videos(self):
+        return [video_id(paper["video"]) for spec in SECTION_SPECS if spec.linked
+                for paper in self.papers[spec.key] if "video" in paper]
+
+    def load_video_sprites(self, root):
+        # Only sheets that earlier --video_sprites runs wrote; never touches the network.
+        self.video_sprites = ThumbnailSprites(root).manifest(self.videos())
+
+    def build_video_sprites(self, root, concurrency=8):
+        cache = ThumbnailCache.for_bib(self.bibtex_filename)
+        videos = self.videos()
+        thumbnails = fetch_thumbnails(videos, cache, concurrency=concurrency)
+        self.video_sprites = ThumbnailSprites(root).build(videos, thumbnails, cache)
+
+    def load_og_images(self):
+        # Only what earlier --og_images runs cached; never touches the network.
+        self.og_images = OgImageCache.for_bib(self.bibtex_filename).images(self.websites())
+
+    def resolve_og_images(self, concurrency=8, refresh=False):
+        cache = OgImageCache.for_bib(self.bibtex_filename)
+        self.og_images = resolve_og_images(self.websites(), cache, concurrency, refresh=refresh)
+
+    def dependencies(self):
+        # output name -> {slot: entries feeding that fragment, in render order}
+        papers = self.papers
+
+        def select(predicate):
+            return [paper for spec in SECTION_SPECS if predicate(spec) for paper in papers[spec.key]]
+
+        linked = select(lambda spec: spec.linked)
+        robots = {}
+        for paper in linked:
+            for robot in paper.get("robots", ()):
+                robots.setdefault(robot, []).append(paper)
+        html = {"publication:" + spec.key: papers[spec.key] for spec in SECTION_SPECS}
+        html["award"] = [paper for paper in select(lambda spec: spec.awards)
+                         if "award" in paper or "award_personal" in paper]
+        return {
+            "html": html,
+            "projects": {"projects": [paper for paper in linked if "website" in paper]},
+            "robots": robots,
+            "videos": {"videos": [paper for paper in linked if "video" in paper]},
+            "cv": {spec.tex: papers[spec.key] for spec in SECTION_SPECS if spec.tex},
+            "jst_csv": {"jst": select(lambda spec: spec.jst)},
+            "jsps_journal_csv": {"jsps_journal": select(lambda spec: spec.jsps == "journal")},
+            "jsps_conf_csv": {"jsps_conf": select(lambda spec: spec.jsps == "conference")},
+        }
+
+    def config_digest(self):
+        # Anything besides the bib and the templates that changes the output.
+        h = hashlib.sha1()
+        h.update(source_digest().encode("utf-8"))
+        h.update((self.ja_name + "\0" + self.en_name + "\0" + str(PARSER_VERSION)).encode("utf-8"))
+        h.update(json.dumps(self.og_images, sort_keys=True).encode("utf-8"))
+        h.update(json.dumps(self.image_variants, sort_keys=True).encode("utf-8"))
+        h.update(json.dumps(self.asset_names, sort_keys=True).encode("utf-8"))
+        h.update(json.dumps(self.video_sprites, sort_keys=True).encode("utf-8"))
+        h.update(str(self.cv_pdf.target if self.cv_pdf else "").encode("utf-8"))
+        h.update(("minify=%s compress=%s" % (self.writer.minify, self.writer.compress)).encode("utf-8"))
+        h.update(("shard_dir=%s" % self.shard_dir).encode("utf-8"))
+        h.update(("search=%s" % self.search).encode("utf-8"))
+        return h.hexdigest()
+
+    def highlight_index(self, authors, highlight_ja):
+        ids = self.highlight_ids[highlight_ja]
+        intern = self.registry.intern
+        for i, a in enumerate(authors):
+            if intern(a) in ids:
+                return i
+        return None
 
     def make_pub(self):
-        self.html_pub = ""
+        # One pass over the entries of every section: each entry is normalized
+        # once and rendered to every output its SectionSpec asks for. Outputs
+        # are collected as fragment lists and joined once at the end.
+        html_pub = []
+        self.html_pub_sections = []
+        self.awards.begin()
+        projects_pub = []
+        videos_pub = []
+        sprite_class = sprite_classes(self.video_sprites)
+        robots_pub = {}
+        tex = {"journal": [], "proceedings": []}
 
-        self.html_award_list = []
-        self.html_award = ""
-        self.html_award += ('\n<ol>\n')
-
-        self.projects_pub = ""
-        self.videos_pub = ""
         robots_set = set()
-        self.robots_pub = {}
         for papers in self.papers.values():
             for paper in papers:
                 if "robots" in paper:
@@ -177,750 +319,292 @@ class MakeHTML:
                         robots_set.add(robot)
         print(robots_set)
         for robot in robots_set:
-            self.robots_pub[robot] = ""
-
-        self.tex_journal = ""
-
-        self.tex_proceedings = ""
+            robots_pub[robot] = []
 
-        self.csv_jst_text = ""
-        self.csv_jsps_journal_text = ""
-        self.csv_jsps_conf_text = ""
+        self.csv_jst_rows = []
+        self.csv_jsps_journal_rows = []
+        self.csv_jsps_conf_rows = []
         self.jsps_journal_paper_no = 0
 
-        # International Journal Papers
-        papers = self.papers["ijournal_papers"]
-        self.html_pub += ('<h3> International Journal Papers </h3>')
-        self.html_pub += ('\n<ol>\n')
-        self.tex_journal += '\\begin{enumerate}\n'
-        for paper in papers:
-            author = paper["author"].split(", ")
-            author2 = paper["author"].split(", ")
-            for i, a in enumerate(author):
-                if self.en_name in a:
-                    author[i] = "<b><u>"+a+"</u></b>"
-                    break
-            for i, a in enumerate(author2):
-                if self.en_name in a:
-                    author2[i] = "\\underline{\\textbf{"+a+"}}"
-                    break
-            author_joined = ", ".join(author)
-            author_joined2 = ", ".join(author2)
-            line = author_joined
-            line2 = author_joined2
-            line += '<br>' + paper["title"]
-            line2 += ": ``" + paper["title"] + "''"
-            line += ', <i>' + paper["booktitle"] + '</i>'
-            line2 += ", \\textit{" + paper["booktitle2"] + "}"
-            if "volume" in paper:
-                line += ", vol. " + paper["volume"]
-                line2 += ", vol. " + paper["volume"]
-            if "number" in paper:
-                line += ", no. " + paper["number"]
-                line2 += ", no. " + paper["number"]
-            if "pages" in paper:
-                line += ", pp. " + paper["pages"]
-                line2 += ", pp. " + paper["pages"]
-            if "year" in paper:
-                line += ", " + paper["year"]
-                line2 += ", " + paper["year"]
-            if "award_personal" in paper:
-                for award in paper["award_personal"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    line2 += ", \\textbf{\\textcolor{red}{"+award+"}}"
-                    if self.en_name in paper["author"].split(", ")[0]:
-                        html_award_tmp = ("<li>" + author_joined.split(", ")[0] + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                        if "date" in paper:
-                            html_award_tmp += (", " + paper["date"])
-                        html_award_tmp += '</li>\n'
-                        if "date" in paper:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                        else:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "award" in paper:
-                for award in paper["award"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    line2 += ", \\textbf{\\textcolor{red}{"+award+"}}"
-                    html_award_tmp = ("<li>" + author_joined + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                    if "date" in paper:
-                        html_award_tmp += (", " + paper["date"])
-                    html_award_tmp += '</li>\n'
-                    if "date" in paper:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                    else:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "note" in paper:
-                line += ", (<b>" + paper["note"] + "</b>)"
-                line2 += ", (\\textbf{" + paper["note"] + "})"
-            if ("doi" in paper) or ("arxiv" in paper) or ("website" in paper) or ("code" in paper) or ("slide" in paper) or ("video" in paper):
-                line += "<br>"
-            if "doi" in paper:
-                line += " <a href=https://doi.org/" + paper["doi"] + " target='_blank' rel='noopener noreferrer'>[Paper Link]</a>"
-            if "arxiv" in paper:
-                line += " <a href=" + paper["arxiv"] + " target='_blank' rel='noopener noreferrer'>[Arxiv Link]</a>"
-            if "website" in paper:
-                line += " <a href=" + paper["website"] + " target='_blank' rel='noopener noreferrer'>[Project Page]</a>"
-                self.projects_pub += self.project_template.format(
-                        card_name=paper["key"],
-                        card_title=paper["title"],
-                        card_text=author_joined+"<br>"+paper["booktitle"],
-                        website_url=paper["website"])
-            if "code" in paper:
-                line += " <a href=" + paper["code"] + " target='_blank' rel='noopener noreferrer'>[Source Code]</a>"
-            if "slide" in paper:
-                line += " <a href=" + paper["slide"] + " target='_blank' rel='noopener noreferrer'>[Slide]</a>"
-            if "video" in paper:
-                line += " <a href=" + paper["video"] + " target='_blank' rel='noopener noreferrer'>[Video]</a>"
-                self.videos_pub += self.video_template.format(
-                        video_title=paper["title"],
-                        video_id=paper["video"].split("=")[1],
-                        )
-            if "robots" in paper:
-                for robot in paper["robots"]:
-                    self.robots_pub[robot] += "<li>"+line+"</li>\n"
-
-            self.html_pub += ("<li>"+line+"</li>\n")
-            self.tex_journal += ("\\item "+line2+"\n")
-
-            self.append_jst_csv([
-                    paper["doi"] if "doi" in paper else "-",
-                    paper["author"],
-                    paper["title"],
-                    paper["booktitle3"],
-                    paper["volume"] if "volume" in paper else "-",
-                    paper["year"] if "year" in paper else "-",
-                    paper["pages"] if "pages" in paper else "-",
-                    "1", "0", "0"
-            ])
-            self.append_jsps_journal_csv(
-                    paper,
-                    peer_reviewed="1",
-                    include_doi=True,
-                    include_volume=True,
-                    include_pages=True)
-        self.html_pub += ('</ol>\n')
-        self.tex_journal += '\\end{enumerate}\n'
-
-        # International Conference Proceedings (Peer Reviewed)
-        papers = self.papers["reviewed_iconference"]
-        self.html_pub += ('<h3> International Conference Proceedings (Peer Reviewed) </h3>')
-        self.html_pub += ('\n<ol>\n')
-        self.tex_proceedings += '\\begin{enumerate}\n'
-        for paper in papers:
-            author = paper["author"].split(", ")
-            author2 = paper["author"].split(", ")
-            for i, a in enumerate(author):
-                if self.en_name in a:
-                    author[i] = "<b><u>"+a+"</u></b>"
-                    break
-            for i, a in enumerate(author2):
-                if self.en_name in a:
-                    author2[i] = "\\underline{\\textbf{"+a+"}}"
-                    break
-            author_joined = ", ".join(author)
-            author_joined2 = ", ".join(author2)
-            line = author_joined
-            line2 = author_joined2
-            line += '<br>' + paper["title"]
-            line2 += ": ``" + paper["title"] + "''"
-            line += ', in <i>' + paper["booktitle"] + '</i>'
-            line2 += ", \\textit{" + paper["booktitle2"] + "}"
-            if "pages" in paper:
-                line += ", pp. " + paper["pages"]
-                line2 += ", pp. " + paper["pages"]
-            if "year" in paper:
-                line += ", " + paper["year"]
-                line2 += ", " + paper["year"]
-            if "award_personal" in paper:
-                for award in paper["award_personal"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    line2 += ", \\textbf{\\textcolor{red}{"+award+"}}"
-                    if self.en_name in paper["author"].split(", ")[0]:
-                        html_award_tmp = ("<li>" + author_joined.split(", ")[0] + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                        if "date" in paper:
-                            html_award_tmp += (", " + paper["date"])
-                        html_award_tmp += '</li>\n'
-                        if "date" in paper:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                        else:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "award" in paper:
-                for award in paper["award"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    line2 += ", \\textbf{\\textcolor{red}{"+award+"}}"
-                    html_award_tmp = ("<li>" + author_joined + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                    if "date" in paper:
-                        html_award_tmp += (", " + paper["date"])
-                    html_award_tmp += '</li>\n'
-                    if "date" in paper:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                    else:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "note" in paper:
-                line += ", (<b>" + paper["note"] + "</b>)"
-                line2 += ", (\\textbf{" + paper["note"] + "})"
-            if ("doi" in paper) or ("arxiv" in paper) or ("website" in paper) or ("code"in paper) or ("slide" in paper) or ("video" in paper):
-                line += "<br>"
-            if "doi" in paper:
-                line += " <a href=https://doi.org/" + paper["doi"] + " target='_blank' rel='noopener noreferrer'>[Paper Link]</a>"
-            if "arxiv" in paper:
-                line += " <a href=" + paper["arxiv"] + " target='_blank' rel='noopener noreferrer'>[Arxiv Link]</a>"
-            if "website" in paper:
-                line += " <a href=" + paper["website"] + " target='_blank' rel='noopener noreferrer'>[Project Page]</a>"
-                self.projects_pub += self.project_template.format(
-                        card_name=paper["key"],
-                        card_title=paper["title"],
-                        card_text=author_joined+"<br>"+paper["booktitle"],
-                        website_url=paper["website"])
-            if "code" in paper:
-                line += " <a href=" + paper["code"] + " target='_blank' rel='noopener noreferrer'>[Source Code]</a>"
-            if "slide" in paper:
-                line += " <a href=" + paper["slide"] + " target='_blank' rel='noopener noreferrer'>[Slide]</a>"
-            if "video" in paper:
-                line += " <a href=" + paper["video"] + " target='_blank' rel='noopener noreferrer'>[Video]</a>"
-                self.videos_pub += self.video_template.format(
-                        video_title=paper["title"],
-                        video_id=paper["video"].split("=")[1],
-                        )
-            if "robots" in paper:
-                for robot in paper["robots"]:
-                    self.robots_pub[robot] += "<li>"+line+"</li>\n"
-
-            self.html_pub += ("<li>"+line+"</li>\n")
-            self.tex_proceedings += ("\\item "+line2+"\n")
-
-            self.append_jst_csv([
-                    paper["author"],
-                    paper["title"],
-                    paper["booktitle3"],
-                    paper["year"] if "year" in paper else "-",
-                    paper["year"] if "year" in paper else "-",
-                    "0", "1"
-            ])
-            self.append_jsps_conf_csv(
-                    paper,
-                    invited="0",
-                    international="1")
-        self.html_pub += ('</ol>\n')
-        self.tex_proceedings += '\\end{enumerate}\n'
-
-        # International Workshop, Extended Abstract, etc.
-        papers = self.papers["workshop_abstract"]
-        self.html_pub += ('<h3> International Workshop, Extended Abstract, etc. </h3>')
-        self.html_pub += ('\n<ol>\n')
-        for paper in papers:
-            author = paper["author"].split(", ")
-            for i, a in enumerate(author):
-                if self.en_name in a:
-                    author[i] = "<b><u>"+a+"</u></b>"
-                    break
-            author_joined = ", ".join(author)
-            line = author_joined
-            line += '<br>' + paper["title"]
-            line += ', <i>' + paper["booktitle"] + '</i>'
-            if "volume" in paper:
-                line += ", vol. " + paper["volume"]
-            if "number" in paper:
-                line += ", no. " + paper["number"]
-            if "pages" in paper:
-                line += ", pp. " + paper["pages"]
-            if "year" in paper:
-                line += ", " + paper["year"]
-            if "award_personal" in paper:
-                for award in paper["award_personal"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    if self.en_name in paper["author"].split(", ")[0]:
-                        html_award_tmp = ("<li>" + author_joined.split(", ")[0] + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                        if "note" in paper:
-                            html_award_tmp += ", (<b>" + paper["note"] + "</b>)"
-                        if "date" in paper:
-                            html_award_tmp += (", " + paper["date"])
-                        html_award_tmp += '</li>\n'
-                        if "date" in paper:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                        else:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "award" in paper:
-                for award in paper["award"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    html_award_tmp = ("<li>" + author_joined + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                    if "note" in paper:
-                        html_award_tmp += ", (<b>" + paper["note"] + "</b>)"
-                    if "date" in paper:
-                        html_award_tmp += (", " + paper["date"])
-                    html_award_tmp += '</li>\n'
-                    if "date" in paper:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                    else:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "note" in paper:
-                line += ", (<b>" + paper["note"] + "</b>)"
-            if ("doi" in paper) or ("arxiv" in paper) or ("website" in paper) or ("code" in paper) or ("slide" in paper) or ("video" in paper):
-                line += "<br>"
-            if "doi" in paper:
-                line += " <a href=https://doi.org/" + paper["doi"] + " target='_blank' rel='noopener noreferrer'>[Paper Link]</a>"
-            if "arxiv" in paper:
-                line += " <a href=" + paper["arxiv"] + " target='_blank' rel='noopener noreferrer'>[Arxiv Link]</a>"
-            if "website" in paper:
-                line += " <a href=" + paper["website"] + " target='_blank' rel='noopener noreferrer'>[Project Page]</a>"
-            if "code" in paper:
-                line += " <a href=" + paper["code"] + " target='_blank' rel='noopener noreferrer'>[Source Code]</a>"
-            if "slide" in paper:
-                line += " <a href=" + paper["slide"] + " target='_blank' rel='noopener noreferrer'>[Slide]</a>"
-            if "video" in paper:
-                line += " <a href=" + paper["video"] + " target='_blank' rel='noopener noreferrer'>[Video]</a>"
-
-            self.html_pub += ("<li>"+line+"</li>\n")
-
-            self.append_jst_csv([
-                    paper["doi"] if "doi" in paper else "-",
-                    paper["author"],
-                    paper["title"],
-                    paper["booktitle3"],
-                    paper["volume"] if "volume" in paper else "-",
-                    paper["year"] if "year" in paper else "-",
-                    paper["pages"] if "pages" in paper else "-",
-                    "1", "0", "0"
-            ])
-            self.append_jsps_conf_csv(
-                    paper,
-                    invited="0",
-                    international="1")
-        self.html_pub += ('</ol>\n')
-
-        papers = self.papers["arxiv_papers"]
-        self.html_pub += ('<h3> arXiv </h3>')
-        self.html_pub += ('\n<ol>\n')
-        for paper in papers:
-            author = paper["author"].split(", ")
-            for i, a in enumerate(author):
-                if self.en_name in a:
-                    author[i] = "<b><u>"+a+"</u></b>"
-                    break
-            author_joined = ", ".join(author)
-            line = author_joined
-            line += '<br>' + paper["title"]
-            if "howpublished" in paper:
-                line += ", " + paper["howpublished"]
-            if "year" in paper:
-                line += ", " + paper["year"]
-            if "note" in paper:
-                line += ", (<b>" + paper["note"] + "</b>)"
-            if ("arxiv" in paper) or ("website" in paper) or ("code" in paper) or ("slide" in paper) or ("video" in paper):
-                line += "<br>"
-            if "arxiv" in paper:
-                line += " <a href=" + paper["arxiv"] + " target='_blank' rel='noopener noreferrer'>[Arxiv Link]</a>"
-            if "website" in paper:
-                line += " <a href=" + paper["website"] + " target='_blank' rel='noopener noreferrer'>[Project Page]</a>"
-                self.projects_pub += self.project_template.format(
-                        card_name=paper["key"],
-                        card_title=paper["title"],
-                        card_text=author_joined+"<br>"+"arXiv",
-                        website_url=paper["website"])
-            if "code" in paper:
-                line += " <a href=" + paper["code"] + " target='_blank' rel='noopener noreferrer'>[Source Code]</a>"
-            if "slide" in paper:
-                line += " <a href=" + paper["slide"] + " target='_blank' rel='noopener noreferrer'>[Slide]</a>"
-            if "video" in paper:
-                line += " <a href=" + paper["video"] + " target='_blank' rel='noopener noreferrer'>[Video]</a>"
-                self.videos_pub += self.video_template.format(
-                        video_title=paper["title"],
-                        video_id=paper["video"].split("=")[1],
-                        )
-            if "robots" in paper:
-                for robot in paper["robots"]:
-                    self.robots_pub[robot] += "<li>"+line+"</li>\n"
-
-            self.html_pub += ("<li>"+line+"</li>\n")
-
-        self.html_pub += ('</ol>\n')
-
-        # Domestic Journal Papers
-        papers = self.papers["djournal_papers"]
-        self.html_pub += ('<h3> Domestic Journal Papers </h3>')
-        self.html_pub += ('\n<ol>\n')
-        for paper in papers:
-            author = paper["author"].split(", ")
-            for i, a in enumerate(author):
-                if (self.ja_name in a) or (self.en_name in a):
-                    author[i] = "<b><u>"+a+"</u></b>"
-                    break
-            author_joined = ", ".join(author)
-            line = author_joined
-            line += '<br>' + paper["title"]
-            line += ', <i>' + paper["booktitle"] + '</i>'
-            if "volume" in paper:
-                line += ", vol. " + paper["volume"]
-            if "number" in paper:
-                line += ", no. " + paper["number"]
-            if "pages" in paper:
-                line += ", pp. " + paper["pages"]
-            if "year" in paper:
-                line += ", " + paper["year"]
-            if "award_personal" in paper:
-                for award in paper["award_personal"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    if (self.ja_name in paper["author"].split(", ")[0]) or (self.en_name in paper["author"].split(", ")[0]):
-                        html_award_tmp = ("<li>" + author_joined.split(", ")[0] + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                        if "date" in paper:
-                            html_award_tmp += (", " + paper["date"])
-                        html_award_tmp += '</li>\n'
-                        if "date" in paper:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
+        for spec in SECTION_SPECS:
+            html_pub.append(spec.heading)
+            html_pub.append('\n<ol>\n')
+            section_lines = []
+            self.html_pub_sections.append((spec, section_lines))
+            tex_out = tex[spec.tex] if spec.tex else None
+            for position, paper in enumerate(self.papers[spec.key]):
+                authors = paper["author"].split(", ")
+                highlight = self.highlight_index(authors, spec.highlight_ja)
+                authors_html = list(authors)
+                if highlight is not None:
+                    authors_html[highlight] = "<b><u>" + authors[highlight] + "</u></b>"
+                author_joined = ", ".join(authors_html)
+
+                line = self.render_html(spec, paper, authors_html, author_joined, highlight, position)
+                html_pub.append("<li>" + line + "</li>\n")
+                section_lines.append((paper.year_num, line))
+                if tex_out is not None:
+                    tex_out.append("\\item " + self.render_tex(spec, paper, authors, highlight) + "\n")
+
+                if spec.linked:
+                    if "website" in paper:
+                        image = self.og_images.get(paper["website"])
+                        if image is None:
+                            card_src = ""
+                            card_script = self.project_script_template.format(
+                                    card_name=paper["key"],
+                                    website_url=paper["website"])
                         else:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "award" in paper:
-                for award in paper["award"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    html_award_tmp = ("<li>" + author_joined + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                    if "date" in paper:
-                        html_award_tmp += (", " + paper["date"])
-                    html_award_tmp += '</li>\n'
-                    if "date" in paper:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                    else:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "note" in paper:
-                line += ", (<b>" + paper["note"] + "</b>)"
-            if ("doi" in paper) or ("arxiv" in paper) or ("website" in paper) or ("code" in paper) or ("slide" in paper) or ("video" in paper):
-                line += "<br>"
-            if "doi" in paper:
-                line += " <a href=https://doi.org/" + paper["doi"] + " target='_blank' rel='noopener noreferrer'>[Paper Link]</a>"
-            if "arxiv" in paper:
-                line += " <a href=" + paper["arxiv"] + " target='_blank' rel='noopener noreferrer'>[Arxiv Link]</a>"
-            if "website" in paper:
-                line += " <a href=" + paper["website"] + " target='_blank' rel='noopener noreferrer'>[Project Page]</a>"
-            if "code" in paper:
-                line += " <a href=" + paper["code"] + " target='_blank' rel='noopener noreferrer'>[Source Code]</a>"
-            if "slide" in paper:
-                line += " <a href=" + paper["slide"] + " target='_blank' rel='noopener noreferrer'>[Slide]</a>"
-            if "video" in paper:
-                line += " <a href=" + paper["video"] + " target='_blank' rel='noopener noreferrer'>[Video]</a>"
-
-            self.html_pub += ("<li>"+line+"</li>\n")
-
-            self.append_jst_csv([
-                    paper["doi"] if "doi" in paper else "-",
-                    paper["author"],
-                    paper["title"],
-                    paper["booktitle3"],
-                    paper["volume"] if "volume" in paper else "-",
-                    paper["year"] if "year" in paper else "-",
-                    paper["pages"] if "pages" in paper else "-",
-                    "1", "0", "0"
-            ])
-            self.append_jsps_journal_csv(
-                    paper,
-                    peer_reviewed="1",
-                    include_doi=True,
-                    include_volume=True,
-                    include_pages=True)
-        self.html_pub += ('</ol>\n')
-
-        # Domestic Conference Proceedings
-        papers = self.papers["reviewed_dconference"]
-        self.html_pub += ('<h3> Domestic Conference Proceedings (Peer Reviewed) </h3>')
-        self.html_pub += ('\n<ol>\n')
-        for paper in papers:
-            author = paper["author"].split(", ")
-            for i, a in enumerate(author):
-                if (self.ja_name in a) or (self.en_name in a):
-                    author[i] = "<b><u>"+a+"</u></b>"
-                    break
-            author_joined = ", ".join(author)
-            line = author_joined
-            line += '<br>' + paper["title"]
-            line += ', in <i>' + paper["booktitle"] + '</i>'
-            if "pages" in paper:
-                line += ", pp. " + paper["pages"]
-            if "year" in paper:
-                line += ", " + paper["year"]
-            if "award_personal" in paper:
-                for award in paper["award_personal"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    if (self.ja_name in paper["author"].split(", ")[0]) or (self.en_name in paper["author"].split(", ")[0]):
-                        html_award_tmp = ("<li>" + author_joined.split(", ")[0] + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                        if "date" in paper:
-                            html_award_tmp += (", " + paper["date"])
-                        html_award_tmp += '</li>\n'
-                        if "date" in paper:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
+                            card_src = " src='" + escape(image) + "'"
+                            card_script = ""
+                        projects_pub.append(self.project_template.format(
+                                card_name=paper["key"],
+                                card_title=paper["title"],
+                                card_text=author_joined + "<br>" + (spec.card_venue or paper["booktitle"]),
+                                website_url=paper["website"],
+                                card_src=card_src,
+                                card_script=card_script))
+                    if "video" in paper:
+                        video = video_id(paper["video"])
+                        if video in sprite_class:
+                            thumbnail = self.video_sprite_template.format(
+                                    sprite_class=sprite_class[video],
+                                    video_title=paper["title"],
+                                    video_id=video)
                         else:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "award" in paper:
-                for award in paper["award"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    html_award_tmp = ("<li>" + author_joined + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                    if "date" in paper:
-                        html_award_tmp += (", " + paper["date"])
-                    html_award_tmp += '</li>\n'
-                    if "date" in paper:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                    else:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "note" in paper:
-                line += ", (<b>" + paper["note"] + "</b>)"
-            if ("doi" in paper) or ("arxiv" in paper) or ("website" in paper) or ("code" in paper) or ("slide" in paper) or ("video" in paper):
-                line += "<br>"
-            if "doi" in paper:
-                line += " <a href=https://doi.org/" + paper["doi"] + " target='_blank' rel='noopener noreferrer'>[Paper Link]</a>"
-            if "arxiv" in paper:
-                line += " <a href=" + paper["arxiv"] + " target='_blank' rel='noopener noreferrer'>[Arxiv Link]</a>"
-            if "website" in paper:
-                line += " <a href=" + paper["website"] + " target='_blank' rel='noopener noreferrer'>[Project Page]</a>"
-            if "code" in paper:
-                line += " <a href=" + paper["code"] + " target='_blank' rel='noopener noreferrer'>[Source Code]</a>"
-            if "slide" in paper:
-                line += " <a href=" + paper["slide"] + " target='_blank' rel='noopener noreferrer'>[Slide]</a>"
-            if "video" in paper:
-                line += " <a href=" + paper["video"] + " target='_blank' rel='noopener noreferrer'>[Video]</a>"
-
-            self.html_pub += ("<li>"+line+"</li>\n")
-
-            self.append_jst_csv([
-                    paper["author"],
-                    paper["title"],
-                    paper["booktitle3"],
-                    paper["year"] if "year" in paper else "-",
-                    paper["year"] if "year" in paper else "-",
-                    "0", "0"
-            ])
-            self.append_jsps_conf_csv(
-                    paper,
-                    invited="0",
-                    international="0")
-        self.html_pub += ('</ol>\n')
-
-        # Domestic Conference Proceedings (No Reviewed)
-        papers = self.papers["non_dconference"]
-        self.html_pub += ('<h3> Domestic Conference Proceedings (No Reviewed) </h3>')
-        self.html_pub += ('\n<ol>\n')
-        for paper in papers:
-            author = paper["author"].split(", ")
-            for i, a in enumerate(author):
-                if (self.ja_name in a) or (self.en_name in a):
-                    author[i] = "<b><u>"+a+"</u></b>"
-                    break
-            author_joined = ", ".join(author)
-            line = author_joined
-            line += '<br>' + paper["title"]
-            line += ', in <i>' + paper["booktitle"] + '</i>'
-            if "pages" in paper:
-                line += ", " + paper["pages"]
-            if "year" in paper:
-                line += ", " + paper["year"]
-            if "award_personal" in paper:
-                for award in paper["award_personal"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    if (self.ja_name in paper["author"].split(", ")[0]) or (self.en_name in paper["author"].split(", ")[0]):
-                        html_award_tmp = ("<li>" + author_joined.split(", ")[0] + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                        if "date" in paper:
-                            html_award_tmp += (", " + paper["date"])
-                        html_award_tmp += '</li>\n'
-                        if "date" in paper:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                        else:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "award" in paper:
-                for award in paper["award"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    html_award_tmp = ("<li>" + author_joined + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                    if "date" in paper:
-                        html_award_tmp += (", " + paper["date"])
-                    html_award_tmp += '</li>\n'
-                    if "date" in paper:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                    else:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "note" in paper:
-                line += ", (<b>" + paper["note"] + "</b>)"
-            if ("doi" in paper) or ("arxiv" in paper) or ("website" in paper) or ("code" in paper) or ("slide" in paper) or ("video" in paper):
-                line += "<br>"
-            if "doi" in paper:
-                line += " <a href=https://doi.org/" + paper["doi"] + " target='_blank' rel='noopener noreferrer'>[Paper Link]</a>"
-            if "arxiv" in paper:
-                line += " <a href=" + paper["arxiv"] + " target='_blank' rel='noopener noreferrer'>[Arxiv Link]</a>"
-            if "website" in paper:
-                line += " <a href=" + paper["website"] + " target='_blank' rel='noopener noreferrer'>[Project Page]</a>"
-            if "code" in paper:
-                line += " <a href=" + paper["code"] + " target='_blank' rel='noopener noreferrer'>[Source Code]</a>"
-            if "slide" in paper:
-                line += " <a href=" + paper["slide"] + " target='_blank' rel='noopener noreferrer'>[Slide]</a>"
-            if "video" in paper:
-                line += " <a href=" + paper["video"] + " target='_blank' rel='noopener noreferrer'>[Video]</a>"
-
-            self.html_pub += ("<li>"+line+"</li>\n")
-
-            self.append_jst_csv([
-                    paper["author"],
-                    paper["title"],
-                    paper["booktitle3"],
-                    paper["year"] if "year" in paper else "-",
-                    paper["year"] if "year" in paper else "-",
-                    "0", "0"
-            ])
-            self.append_jsps_conf_csv(
-                    paper,
-                    invited="0",
-                    international="0")
-        self.html_pub += ('</ol>\n')
-
-        # Invited Talks, etc.
-        papers = self.papers["invited"]
-        self.html_pub += ('<h3> Invited Talks, Books, etc.</h3>')
-        self.html_pub += ('\n<ol>\n')
-        for paper in papers:
-            author = paper["author"].split(", ")
-            for i, a in enumerate(author):
-                if (self.ja_name in a) or (self.en_name in a):
-                    author[i] = "<b><u>"+a+"</u></b>"
-                    break
-            author_joined = ", ".join(author)
-            line = author_joined
-            line += '<br>' + paper["title"]
-            if "note" in paper:
-                line += ', ' + paper["note"]
-            line += ', in <i>' + paper["booktitle"] + '</i>'
-            if "award_personal" in paper:
-                for award in paper["award_personal"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    if (self.ja_name in paper["author"].split(", ")[0]) or (self.en_name in paper["author"].split(", ")[0]):
-                        html_award_tmp = ("<li>" + author_joined.split(", ")[0] + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                        if "date" in paper:
-                            html_award_tmp += (", " + paper["date"])
-                        html_award_tmp += '</li>\n'
-                        if "date" in paper:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                        else:
-                            self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "award" in paper:
-                for award in paper["award"]:
-                    line += ", <b><font color='red'>"+award+"</font></b>"
-                    html_award_tmp = ("<li>" + author_joined + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>')
-                    if "date" in paper:
-                        html_award_tmp += (", " + paper["date"])
-                    html_award_tmp += '</li>\n'
-                    if "date" in paper:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y.%m.%d"), html_award_tmp))
-                    else:
-                        self.html_award_list.append((time.strptime(paper["date"], "%Y"), html_award_tmp))
-            if "date" in paper:
-                line += ", " + paper["date"]
-            if ("website" in paper) or ("slide" in paper) or ("video" in paper):
-                line += "<br>"
-            if "website" in paper:
-                line += " <a href=" + paper["website"] + " target='_blank' rel='noopener noreferrer'>[Website]</a>"
-            if "slide" in paper:
-                line += " <a href=" + paper["slide"] + " target='_blank' rel='noopener noreferrer'>[Slide]</a>"
-            if "video" in paper:
-                line += " <a href=" + paper["video"] + " target='_blank' rel='noopener noreferrer'>[Video]</a>"
-
-            self.html_pub += ("<li>"+line+"</li>\n")
-
-            self.append_jst_csv([
-                    paper["author"],
-                    paper["title"],
-                    paper["booktitle3"],
-                    paper["year"] if "year" in paper else "-",
-                    paper["year"] if "year" in paper else "-",
-                    "1", "0"
-            ])
-            self.append_jsps_conf_csv(
-                    paper,
-                    invited="1",
-                    international="0")
-        self.html_pub += ('</ol>\n')
-
-        self.html_award_list.sort(reverse=True)
-        for html_award_tmp in self.html_award_list:
-            self.html_award += html_award_tmp[1]
-        self.html_award += ('</ol>\n')
+                            thumbnail = self.video_thumbnail_template.format(
+                                    video_title=paper["title"],
+                                    video_id=video)
+                        videos_pub.append(self.video_template.format(
+                                video_title=paper["title"],
+                                video_id=video,
+                                thumbnail=thumbnail,
+                                ))
+                    if "robots" in paper:
+                        for robot in paper["robots"]:
+                            robots_pub[robot].append("<li>" + line + "</li>\n")
+
+                if spec.jst == "journal":
+                    self.append_jst_csv([
+                            paper.get("doi", "-"),
+                            paper["author"],
+                            paper["title"],
+                            paper["booktitle3"],
+                            paper.get("volume", "-"),
+                            paper.get("year", "-"),
+                            paper.get("pages", "-"),
+                            "1", "0", "0"
+                    ])
+                elif spec.jst == "conference":
+                    self.append_jst_csv([
+                            paper["author"],
+                            paper["title"],
+                            paper["booktitle3"],
+                            paper.get("year", "-"),
+                            paper.get("year", "-"),
+                            spec.invited, spec.international
+                    ])
+                if spec.jsps == "journal":
+                    self.append_jsps_journal_csv(
+                            paper,
+                            peer_reviewed="1",
+                            include_doi=True,
+                            include_volume=True,
+                            include_pages=True)
+                elif spec.jsps == "conference":
+                    self.append_jsps_conf_csv(
+                            paper,
+                            invited=spec.invited,
+                            international=spec.international)
+            html_pub.append('</ol>\n')
+
+        self.awards.end()
+        html_award = ['\n<ol>\n'] + self.awards.top() + ['</ol>\n']
+
+        self.html_pub = "".join(html_pub)
+        self.html_award = "".join(html_award)
+        self.projects_pub = "".join(projects_pub)
+        self.videos_pub = "".join(videos_pub)
+        self.robots_pub = {robot: "".join(pub) for robot, pub in robots_pub.items()}
+        self.tex_journal = "\\begin{enumerate}\n" + "".join(tex["journal"]) + "\\end{enumerate}\n"
+        self.tex_proceedings = "\\begin{enumerate}\n" + "".join(tex["proceedings"]) + "\\end{enumerate}\n"
+        self.csv_jst_text = "".join(self.csv_jst_rows)
+        self.csv_jsps_journal_text = "".join(self.csv_jsps_journal_rows)
+        self.csv_jsps_conf_text = "".join(self.csv_jsps_conf_rows)
+
+    def render_html(self, spec, paper, authors_html, author_joined, highlight, position):
+        parts = [author_joined, '<br>', paper["title"]]
+        for name, prefix, suffix in spec.pre_venue:
+            value = getattr(paper, name)
+            if value is not None:
+                parts += [prefix, value, suffix]
+        if spec.venue is not None:
+            parts += [spec.venue, paper["booktitle"], '</i>']
+        for name, prefix in spec.fields:
+            value = getattr(paper, name)
+            if value is not None:
+                parts += [prefix, value]
+        if spec.awards:
+            for i, award in enumerate(paper.get("award_personal", ())):
+                parts += [", <b><font color='red'>", award, "</font></b>"]
+                if highlight == 0:
+                    self.add_award((spec.key, position, "award_personal", i), spec, paper, authors_html[0], award)
+            for i, award in enumerate(paper.get("award", ())):
+                parts += [", <b><font color='red'>", award, "</font></b>"]
+                self.add_award((spec.key, position, "award", i), spec, paper, author_joined, award)
+        for name, prefix, suffix in spec.post_award:
+            value = getattr(paper, name)
+            if value is not None:
+                parts += [prefix, value, suffix]
+        links = []
+        for name, url_prefix, label in spec.links:
+            value = getattr(paper, name)
+            if value is not None:
+                links += [" <a href=", url_prefix, value, " target='_blank' rel='noopener noreferrer'>", label, "</a>"]
+        if links:
+            parts.append("<br>")
+            parts += links
+        return "".join(parts)
+
+    def render_tex(self, spec, paper, authors, highlight):
+        authors = list(authors)
+        if highlight is not None:
+            authors[highlight] = "\\underline{\\textbf{" + authors[highlight] + "}}"
+        parts = [", ".join(authors), ": ``", paper["title"], "''", ", \\textit{", paper["booktitle2"], "}"]
+        for name, prefix in spec.fields:
+            value = getattr(paper, name)
+            if value is not None:
+                parts += [prefix, value]
+        for award in paper.get("award_personal", []) + paper.get("award", []):
+            parts += [", \\textbf{\\textcolor{red}{", award, "}}"]
+        if "note" in paper:
+            parts += [", (\\textbf{", paper["note"], "})"]
+        return "".join(parts)
+
+    def add_award(self, item_id, spec, paper, who, award):
+        # item_id: (section, position in it, field, index); bib keys are not unique
+        html_award_tmp = "<li>" + who + "<br>" + award + ", <i>" + paper["booktitle"] + '</i>'
+        if spec.award_note and "note" in paper:
+            html_award_tmp += ", (<b>" + paper["note"] + "</b>)"
+        if "date" in paper:
+            html_award_tmp += ", " + paper["date"]
+        html_award_tmp += '</li>\n'
+        self.awards.add(item_id, award_date_key(paper), html_award_tmp)
+
+    def splice(self, base_filename, out_filename, header, slots):
+        template = load_template(base_filename)
+        with self.writer.open(out_filename) as out:
+            out.write(header)
+            if header == HTML_HEADER and (self.image_variants or self.asset_names):
+                page = io.StringIO()
+                template.write(page, slots)
+                out.write(self.postprocess_html(page.getvalue()))
+            else:
+                template.write(out, slots)
+
+    def postprocess_html(self, page):
+        if self.image_variants:
+            page = add_srcset(page, self.image_variants)
+        if self.asset_names:
+            page = rewrite_refs(page, self.asset_names)
+        return page
 
     def integrate_html(self, base_filename, out_filename):
-        base = open(base_filename, "r")
-        out = open(out_filename, "w")
-        lines = []
-        lines.append("<!-- This file is automatically generated. Do not modify -->\n")
-        for line in base:
-            if "publication_replace_by_python" in line:
-                lines.append(self.html_pub)
-            if "award_replace_by_python" in line:
-                lines.append(self.html_award)
-            lines.append(line)
-        out.writelines(lines)
+        html_pub = self.html_pub
+        extras = []
+        if self.shard_dir is not None:
+            html_pub, extras = self.write_pub_shards(os.path.dirname(os.path.abspath(out_filename)))
+        search_html = ""
+        if self.search:
+            index = build_search_index([(re.sub(r"<[^>]+>", "", spec.heading).strip(), self.papers[spec.key])
+                                        for spec in SECTION_SPECS])
+            index_filename = os.path.join(os.path.dirname(os.path.abspath(out_filename)), "search-index.json")
+            with self.writer.open(index_filename) as out:
+                out.write(dump_search_index(index))
+            extras.append(index_filename)
+            search_html = SEARCH_HTML
+        self.splice(base_filename, out_filename, HTML_HEADER,
+                    {"publication": html_pub, "award": self.html_award, "search": search_html})
+        self.extra_outputs[os.path.abspath(out_filename)] = extras
+
+    def write_pub_shards(self, out_dir):
+        # Writes <section>.html and <section>-<year>.html fragments of <li>
+        # lines to shard_dir; returns the skeleton that loads them and the
+        # paths written.
+        shard_dir = os.path.join(out_dir, self.shard_dir)
+        os.makedirs(shard_dir, exist_ok=True)
+        shards = {}
+        skeleton = []
+        for spec, lines in self.html_pub_sections:
+            section_file = self.shard_dir + "/" + spec.key + ".html"
+            shards[section_file] = "".join("<li>" + line + "</li>\n" for year, line in lines)
+            years = {}
+            for number, (year, line) in enumerate(lines, 1):
+                # value keeps the numbering of the full list inside each year
+                years.setdefault(year, []).append("<li value=" + str(number) + ">" + line + "</li>\n")
+            skeleton.append(spec.heading)
+            skeleton.append("\n<div class='pub-section'>\n")
+            skeleton.append("<p><a class='pub-all' href='" + section_file + "'>Show all " + str(len(lines)) + "</a></p>\n")
+            for i, (year, items) in enumerate(years.items()):
+                label = "undated" if year is None else str(year)
+                year_file = self.shard_dir + "/" + spec.key + "-" + label + ".html"
+                shards[year_file] = "".join(items)
+                skeleton.append("<details class='pub-year' data-shard='" + year_file + "'" + (" open" if i == 0 else "") + ">"
+                                + "<summary>" + label + " (" + str(len(items)) + ")</summary><ol></ol></details>\n")
+            skeleton.append("</div>\n")
+        skeleton.append(PUB_SHARD_SCRIPT)
+
+        for name, content in shards.items():
+            with self.writer.open(os.path.join(out_dir, name)) as out:
+                out.write(content)
+        written = set(os.path.basename(name) for name in shards)
+        for name in os.listdir(shard_dir):
+            shard = name[:-3] if name.endswith((".gz", ".br")) else name
+            if shard.endswith(".html") and shard not in written:
+                os.unlink(os.path.join(shard_dir, name))
+        return "".join(skeleton), [os.path.join(out_dir, name) for name in shards]
 
     def integrate_projects_html(self, base_filename, out_filename):
-        base = open(base_filename, "r")
-        out = open(out_filename, "w")
-        lines = []
-        lines.append("<!-- This file is automatically generated. Do not modify -->\n")
-        for line in base:
-            if "projects_replace_by_python" in line:
-                lines.append(self.projects_pub)
-            lines.append(line)
-        out.writelines(lines)
+        self.splice(base_filename, out_filename, HTML_HEADER, {"projects": self.projects_pub})
 
     def integrate_robots_html(self, base_filename, out_filename):
-        base = open(base_filename, "r")
-        out = open(out_filename, "w")
-        lines = []
-        lines.append("<!-- This file is automatically generated. Do not modify -->\n")
-        for line in base:
-            matches = re.findall(r'\s*<!--\s*([^>]+)_replace_by_python\s*-->\s*', line)
-            if len(matches) > 0:
-                robot = matches[0]
-                lines.append(self.robots_pub[robot])
-            lines.append(line)
-        out.writelines(lines)
+        self.splice(base_filename, out_filename, HTML_HEADER, self.robots_pub)
 
     def integrate_videos_html(self, base_filename, out_filename):
-        base = open(base_filename, "r")
-        out = open(out_filename, "w")
-        lines = []
-        lines.append("<!-- This file is automatically generated. Do not modify -->\n")
-        for line in base:
-            if "videos_replace_by_python" in line:
-                lines.append(self.videos_pub)
-            lines.append(line)
-        out.writelines(lines)
+        videos_pub = self.videos_pub
+        if self.video_sprites:
+            videos_pub = "<style>\n" + sprite_css(self.video_sprites) + "\n</style>\n" + videos_pub
+        self.splice(base_filename, out_filename, HTML_HEADER, {"videos": videos_pub})
 
     def integrate_tex(self, base_filename, out_filename):
-        base = open(base_filename, "r")
-        out = open(out_filename, "w")
-        lines = []
-        lines.append("%This file is automatically generated. Do not modify\n")
-        for line in base:
-            if "journal_replace_by_python" in line:
-                lines.append(self.tex_journal)
-            if "proceedings_replace_by_python" in line:
-                lines.append(self.tex_proceedings)
-            lines.append(line)
-        out.writelines(lines)
+        self.splice(base_filename, out_filename, TEX_HEADER,
+                    {"journal": self.tex_journal, "proceedings": self.tex_proceedings})
+
+    def cv_tex(self, base_filename):
+        # what integrate_tex writes, for the CV pdf job
+        page = io.StringIO()
+        page.write(TEX_HEADER)
+        load_template(base_filename).write(page, {"journal": self.tex_journal, "proceedings": self.tex_proceedings})
+        return page.getvalue()
 
     def integrate_csv(self, out_filename):
-        out = open(out_filename, "w", encoding="utf8")
-        lines = []
-        lines.append("DOI,著者名,タイトル,掲載誌・学会名,巻または発表年,発行年または終了年,ページ,査読ありまたは招待講演,国際共著または国際学会,オープンアクセス\n")
-        lines.append(self.csv_jst_text)
-        out.writelines(lines)
+        with self.writer.open(out_filename) as out:
+            out.write("DOI,著者名,タイトル,掲載誌・学会名,巻または発表年,発行年または終了年,ページ,査読ありまたは招待講演,国際共著または国際学会,オープンアクセス\n")
+            out.write(self.csv_jst_text)
 
     def integrate_jsps_journal_csv(self, out_filename):
-        out = open(out_filename, "w", encoding="utf8")
-        lines = []
-        lines.append("区分（論文情報は「１」、根拠データは「２」を入力）,論文番号,根拠データ番号,掲載論文のDOI,著者名,論文標題,雑誌名,巻,発行年,最初と最後の頁,査読の有無,国際共著,オープンアクセス,掲載論文の根拠データ（DOI）,掲載論文の根拠データ（URL）,データの名称,データの説明,データの分野【項目から選択制】,データ種別【項目から選択制】,提供条件,ライセンス条件等の選択,事前連絡確認,リポジトリ情報,データ管理機関,データ管理部署,データ管理部署の連絡先メールアドレス\n")
-        lines.append(self.csv_jsps_journal_text)
-        out.writelines(lines)
+        with self.writer.open(out_filename) as out:
+            out.write("区分（論文情報は「１」、根拠データは「２」を入力）,論文番号,根拠データ番号,掲載論文のDOI,著者名,論文標題,雑誌名,巻,発行年,最初と最後の頁,査読の有無,国際共著,オープンアクセス,掲載論文の根拠データ（DOI）,掲載論文の根拠データ（URL）,データの名称,データの説明,データの分野【項目から選択制】,データ種別【項目から選択制】,提供条件,ライセンス条件等の選択,事前連絡確認,リポジトリ情報,データ管理機関,データ管理部署,データ管理部署の連絡先メールアドレス\n")
+            out.write(self.csv_jsps_journal_text)
 
     def integrate_jsps_conf_csv(self, out_filename):
-        out = open(out_filename, "w", encoding="utf8")
-        lines = []
-        lines.append("発表者名,発表title,学会等名,発表年(開始),発表年(終了),招待講演,国際学会\n")
-        lines.append(self.csv_jsps_conf_text)
-        out.writelines(lines)
+        with self.writer.open(out_filename) as out:
+            out.write("発表者名,発表title,学会等名,発表年(開始),発表年(終了),招待講演,国際学会\n")
+            out.write(self.csv_jsps_conf_text)
 
     def append_jst_csv(self, csv_one_data):
         csv_one_data = ['\"' + self.escape_csv(data) + '\"' for data in csv_one_data]
-        self.csv_jst_text += ",".join(csv_one_data) + "\n"
+        self.csv_jst_rows.append(",".join(csv_one_data) + "\n")
 
     def append_jsps_journal_csv(self, paper, peer_reviewed, include_doi, include_volume, include_pages):
         self.jsps_journal_paper_no += 1
@@ -941,7 +625,7 @@ class MakeHTML:
         ]
         csv_one_data.extend([""] * 13)
         csv_one_data = ['\"' + self.escape_csv(data) + '\"' for data in csv_one_data]
-        self.csv_jsps_journal_text += ",".join(csv_one_data) + "\n"
+        self.csv_jsps_journal_rows.append(",".join(csv_one_data) + "\n")
 
     def append_jsps_conf_csv(self, paper, invited, international):
         year = paper["year"] if "year" in paper else ""
@@ -955,12 +639,87 @@ class MakeHTML:
                 international
         ]
         csv_one_data = ['\"' + self.escape_csv(data) + '\"' for data in csv_one_data]
-        self.csv_jsps_conf_text += ",".join(csv_one_data) + "\n"
+        self.csv_jsps_conf_rows.append(",".join(csv_one_data) + "\n")
 
     def escape_csv(self, data):
         return str(data).replace('\"', '\"\"')
 
 
+def source_digest():
+    # The modules of this directory the build has loaded: all of them shape
+    # the output (templates, writer, minifier, image and asset rewriting...).
+    here = Path(__file__).resolve().parent
+    paths = {Path(module.__file__).resolve() for module in list(sys.modules.values())
+             if getattr(module, "__file__", None)}
+    h = hashlib.sha1()
+    for path in sorted(path for path in paths if path.parent == here and path.suffix == ".py"):
+        h.update(path.name.encode("utf-8") + b"\0" + path.read_bytes())
+    return h.hexdigest()
+
+
+def run_integrate(base, out, integrate):
+    if base is None:
+        integrate(out)
+    else:
+        integrate(base, out)
+
+
+def finish_pdf(pdf):
+    if pdf is None:
+        return False
+    message, changed = pdf.result()
+    print(message)
+    return changed
+
+
+def build(makeHTML, outputs, state=None, jobs=1):
+    # outputs: [(name, base file or None, output file, integrate method)]
+    # Returns whether the CV pdf was rewritten.
+    pdf = None
+    if state is not None:
+        dependencies = makeHTML.dependencies()
+        stale = []
+        for name, base, out, integrate in outputs:
+            changed = state.changed_slots(out, base, dependencies[name])
+            if changed is None:
+                print("up to date: " + out)
+                if name == "cv" and makeHTML.cv_pdf is not None:
+                    # an earlier pdf build may have failed or the pdf been removed
+                    pdf = makeHTML.cv_pdf.start_if_missing(out)
+            else:
+                print("rebuild: " + out + " (" + ", ".join(changed) + ")")
+                stale.append((name, base, out, integrate))
+        outputs = stale
+        if not outputs:
+            return finish_pdf(pdf)
+
+    makeHTML.make_pub()
+    makeHTML.writer.reset()
+    if makeHTML.cv_pdf is not None:
+        # LaTeX runs in the background while the other outputs are written
+        for name, base, out, integrate in outputs:
+            if name == "cv":
+                pdf = makeHTML.cv_pdf.start(makeHTML.cv_tex(base))
+    if jobs > 1 and len(outputs) > 1:
+        # Every output goes to its own file, so the result does not depend
+        # on the scheduling; result() re-raises the first failure in order.
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(run_integrate, base, out, integrate)
+                       for name, base, out, integrate in outputs]
+            for future in futures:
+                future.result()
+    else:
+        for name, base, out, integrate in outputs:
+            run_integrate(base, out, integrate)
+    print(makeHTML.writer.report())
+    pdf_changed = finish_pdf(pdf)
+    if state is not None:
+        for name, base, out, integrate in outputs:
+            state.update(out, base, dependencies[name], makeHTML.extra_outputs.get(os.path.abspath(out), ()))
+        state.save()
+    return pdf_changed
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="make_html_from_bib")
@@ -992,18 +751,141 @@ def main():
                         help='output JSPS journal csv file')
     parser.add_argument('--jsps_conf_csvout', type=str, default="main_jsps_conf.csv",
                         help='output JSPS conference csv file')
+    parser.add_argument('--cv_pdf', action='store_true',
+                        help='also build the CV pdf with platex and dvipdfmx, only when the generated tex changed')
+    parser.add_argument('--cv_pdfout', type=str, default="static/kawaharazuka-cv.pdf",
+                        help='output CV pdf file')
+    parser.add_argument('--no_cache', action='store_true',
+                        help='ignore and do not update the parsed bib cache')
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help='only regenerate outputs whose bib entries or base files changed')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='number of outputs written concurrently')
+    parser.add_argument('--watch', '-w', action='store_true',
+                        help='keep running and rebuild affected outputs when the bib or base files change')
+    parser.add_argument('--poll', action='store_true',
+                        help='poll file timestamps instead of using inotify in watch mode')
+    parser.add_argument('--og_images', action='store_true',
+                        help='fetch the og:image of project websites missing from the cache and embed it in the cards')
+    parser.add_argument('--og_refresh', action='store_true',
+                        help='with --og_images, refetch every og:image instead of only missing or stale ones')
+    parser.add_argument('--og_concurrency', type=int, default=8,
+                        help='number of project websites (or video thumbnails) fetched at once')
+    parser.add_argument('--video_sprites', action='store_true',
+                        help='download the YouTube thumbnails missing from the cache and pack them into sprite sheets under static/thumbs/ (needs Pillow)')
+    parser.add_argument('--images', action='store_true',
+                        help='make resized AVIF/WebP/PNG variants of the static/ images in the html bases (needs Pillow)')
+    parser.add_argument('--image_jobs', type=int, default=None,
+                        help='number of images processed in parallel')
+    parser.add_argument('--shard_pub', action='store_true',
+                        help='write the publication list as per-section and per-year shards under pub/ that index.html loads on demand')
+    parser.add_argument('--search', action='store_true',
+                        help='add a publication search box to index.html backed by a prebuilt search-index.json')
+    parser.add_argument('--minify', action='store_true',
+                        help='minify the generated html files')
+    parser.add_argument('--compress', action='store_true',
+                        help='also write .gz (and .br with the brotli module) companions of the generated html files')
+    parser.add_argument('--fingerprint', action='store_true',
+                        help='link style.css and static/ files by content-hashed copies and write asset-manifest.json and _headers')
     args = parser.parse_args()
-    makeHTML = MakeHTML(args.file)
+    makeHTML = MakeHTML(args.file, use_cache=not args.no_cache)
+    makeHTML.writer = OutputWriter(minify=args.minify, compress=args.compress)
+    if args.shard_pub:
+        makeHTML.shard_dir = "pub"
+    makeHTML.search = args.search
+    if args.cv_pdf:
+        makeHTML.cv_pdf = CvPdf(args.file, os.path.dirname(os.path.abspath(args.cvbase)), args.cv_pdfout)
     makeHTML.parse_bib()
-    makeHTML.make_pub()
-    makeHTML.integrate_html(args.base, args.out)
-    makeHTML.integrate_projects_html(args.projects_base, args.projects_out)
-    makeHTML.integrate_robots_html(args.robots_base, args.robots_out)
-    makeHTML.integrate_videos_html(args.videos_base, args.videos_out)
-    makeHTML.integrate_tex(args.cvbase, args.cvout)
-    makeHTML.integrate_csv(args.csvout)
-    makeHTML.integrate_jsps_journal_csv(args.jsps_journal_csvout)
-    makeHTML.integrate_jsps_conf_csv(args.jsps_conf_csvout)
+
+    def update_og_images(refresh=False):
+        if args.og_images:
+            makeHTML.resolve_og_images(args.og_concurrency, refresh)
+        else:
+            makeHTML.load_og_images()
+
+    update_og_images(args.og_refresh)
+
+    html_bases = [args.base, args.projects_base, args.robots_base, args.videos_base]
+    site_root = os.path.dirname(os.path.abspath(args.out))
+
+    def update_video_sprites():
+        if args.video_sprites:
+            makeHTML.build_video_sprites(site_root, args.og_concurrency)
+        else:
+            makeHTML.load_video_sprites(site_root)
+
+    update_video_sprites()
+    images = ImageVariants(site_root)
+
+    def update_assets(process=False):
+        texts = []
+        for base in html_bases:
+            with open(base, "r", encoding="utf-8") as f:
+                texts.append(f.read())
+        makeHTML.image_variants = images.manifest(find_images(texts), process, args.image_jobs)
+        if args.fingerprint:
+            refs = set()
+            for text in texts:
+                refs |= local_refs(text)
+            for entry in makeHTML.image_variants.values():
+                refs.update(variant["path"] for variant in entry["variants"])
+            asset_writer = OutputWriter()
+            makeHTML.asset_names = fingerprint(site_root, refs, asset_writer)
+            print("fingerprinted %d assets" % len(makeHTML.asset_names))
+
+    update_assets(args.images)
+
+    outputs = [
+        ("html", args.base, args.out, makeHTML.integrate_html),
+        ("projects", args.projects_base, args.projects_out, makeHTML.integrate_projects_html),
+        ("robots", args.robots_base, args.robots_out, makeHTML.integrate_robots_html),
+        ("videos", args.videos_base, args.videos_out, makeHTML.integrate_videos_html),
+        ("cv", args.cvbase, args.cvout, makeHTML.integrate_tex),
+        ("jst_csv", None, args.csvout, makeHTML.integrate_csv),
+        ("jsps_journal_csv", None, args.jsps_journal_csvout, makeHTML.integrate_jsps_journal_csv),
+        ("jsps_conf_csv", None, args.jsps_conf_csvout, makeHTML.integrate_jsps_conf_csv),
+    ]
+    state = None
+    if args.incremental or args.watch:
+        state = BuildState(args.file, makeHTML.config_digest())
+
+    def build_site():
+        nonlocal state
+        if build(makeHTML, outputs, state, args.jobs) and args.fingerprint:
+            # the pages were written against the old pdf's fingerprinted copy
+            update_assets()
+            if state is not None:
+                state = BuildState(args.file, makeHTML.config_digest())
+            build(makeHTML, outputs, state, args.jobs)
+
+    build_site()
+    if not args.watch:
+        return
+
+    bib_path = os.path.abspath(args.file)
+
+    def rebuild(changed):
+        nonlocal state
+        start = time.monotonic()
+        try:
+            if bib_path in changed:
+                makeHTML.parse_bib()
+                update_og_images()
+                update_video_sprites()
+            update_assets(args.images)
+            if makeHTML.config_digest() != state.config_digest:
+                state = BuildState(args.file, makeHTML.config_digest())
+            build_site()
+        except Exception as e:  # keep watching while the bib is half-edited
+            print("build failed: " + str(e))
+            return
+        print("rebuilt in %.0f ms" % ((time.monotonic() - start) * 1000))
+
+    try:
+        watch([args.file, args.base, args.projects_base, args.robots_base, args.videos_base, args.cvbase],
+              rebuild, polling=args.poll)
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == '__main__':
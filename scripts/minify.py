@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import re
+
+
+# Content of these elements is kept byte for byte.
+_RAW = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>|<!--.*?-->)", re.DOTALL | re.IGNORECASE)
+_LINE_BREAK = re.compile(r"[ \t\r\f]*\n\s*")
+_SPACES = re.compile(r"[ \t\r\f]+")
+_TAG = re.compile(r"<[^<>]*>")
+_TAG_END = re.compile(r"\s+(/?>)$")
+# A value without spaces, quotes, "=", "<", ">" or "`" needs no quotes, unless
+# a "/" follows it, which would then become part of the value.
+_QUOTED_VALUE = re.compile(r"""(\s[\w:.-]+)=(["'])([^\s"'=<>`]+)\2(?=[\s>])""")
+
+
+def _keep_comment(comment: str) -> bool:
+    # conditional comments and the "automatically generated" header stay
+    return comment.startswith("<!--[if") or "Do not modify" in comment
+
+
+def minify_html(html: str) -> str:
+    # Minification that never changes the rendering: runs of whitespace
+    # shrink to one newline or space (browsers collapse them anyway outside
+    # <pre>/<textarea>), simple attribute values lose their quotes
+    # (target='_blank' -> target=_blank), comments are dropped, and script,
+    # style, pre and textarea contents are left alone.
+    parts = []
+    pos = 0
+    for match in _RAW.finditer(html):
+        parts.append(_collapse(html[pos:match.start()]))
+        raw = match.group(1)
+        if not raw.startswith("<!--") or _keep_comment(raw):
+            parts.append(raw)
+        pos = match.end()
+    parts.append(_collapse(html[pos:]))
+    return "".join(parts)
+
+
+def _collapse(text: str) -> str:
+    text = _LINE_BREAK.sub("\n", text)
+    text = _SPACES.sub(" ", text)
+    return _TAG.sub(_minify_tag, text)
+
+
+def _minify_tag(match) -> str:
+    return _QUOTED_VALUE.sub(r"\1=\3", _TAG_END.sub(r"\1", match.group(0)))
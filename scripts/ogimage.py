@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import argparse
+from html.parser import HTMLParser
+from pathlib import Path
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urljoin
+
+from bibparser import CACHE_DIRNAME
+from fetch import fetch, fetch_all, stand_in_server
+
+
+CACHE_FILENAME = "og_images.json"
+# og:image sits in <head>; never download more of a page than this.
+MAX_PAGE_BYTES = 512 * 1024
+# Found images are re-checked after a month, failures on the next day. A
+# failed re-check keeps the image found before.
+MAX_AGE = 30 * 24 * 3600
+MAX_AGE_MISSING = 24 * 3600
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _OgImageParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.image: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            raise _StopParsing()
+        if tag != "meta":
+            return
+        attrs = dict(attrs)
+        if (attrs.get("property") or attrs.get("name")) == "og:image" and attrs.get("content"):
+            self.image = attrs["content"].strip()
+            raise _StopParsing()
+
+
+def find_og_image(page: str) -> Optional[str]:
+    parser = _OgImageParser()
+    try:
+        parser.feed(page)
+    except _StopParsing:
+        pass
+    return parser.image
+
+
+def fetch_og_image(url: str, timeout: float = 10.0) -> Optional[str]:
+    # The image URL, resolved against the page's final URL (after
+    # redirects), or None if the page has none or cannot be fetched.
+    return _fetch_og_image(url, timeout)[1]
+
+
+def _fetch_og_image(url: str, timeout: float) -> Tuple[bool, Optional[str]]:
+    # (whether the page was fetched, its image)
+    fetched = fetch(url, timeout, MAX_PAGE_BYTES)
+    if fetched is None:
+        return False, None
+    data, final_url, charset = fetched
+    try:
+        page = data.decode(charset, errors="replace")
+    except LookupError:  # unknown charset name
+        page = data.decode("utf-8", errors="replace")
+    image = find_og_image(page)
+    return True, urljoin(final_url, image) if image else None
+
+
+# Remembers, per website URL, its resolved og:image (or that it had none)
+# and when it was checked.
+class OgImageCache:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        try:
+            with self.path.open("r", encoding="utf-8") as fh:
+                self.entries = json.load(fh)
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def for_bib(cls, bib_path) -> "OgImageCache":
+        return cls(Path(bib_path).parent / CACHE_DIRNAME / CACHE_FILENAME)
+
+    def get(self, url: str) -> Optional[str]:
+        entry = self.entries.get(url)
+        return entry["image"] if entry else None
+
+    def images(self, urls: Iterable[str]) -> Dict[str, str]:
+        return {url: self.get(url) for url in urls if self.get(url)}
+
+    def is_stale(self, url: str, now: float) -> bool:
+        entry = self.entries.get(url)
+        if entry is None:
+            return True
+        max_age = MAX_AGE if entry["image"] else MAX_AGE_MISSING
+        return now - entry["checked"] > max_age
+
+    def update(self, url: str, image: Optional[str], now: float, failed: bool = False) -> None:
+        if failed and self.get(url):
+            # the page could not be fetched: keep the known image until the next re-check
+            self.entries[url]["checked"] = now
+            return
+        self.entries[url] = {"image": image, "checked": now}
+
+    def save(self) -> None:
+        try:
+            self.path.parent.mkdir(exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(self.entries, fh, indent=1, sort_keys=True, ensure_ascii=False)
+            os.replace(tmp_name, self.path)
+        except OSError:
+            pass
+
+
+def resolve_og_images(urls: Iterable[str], cache: OgImageCache, concurrency: int = 8,
+                      timeout: float = 10.0, refresh: bool = False) -> Dict[str, str]:
+    # Fetches the pages whose cache entry is missing or stale, at most
+    # `concurrency` at a time, and returns url -> image for every url that has one.
+    urls = list(dict.fromkeys(urls))
+    now = time.time()
+    todo = [url for url in urls if refresh or cache.is_stale(url, now)]
+    if todo:
+        fetched = fetch_all(lambda url: _fetch_og_image(url, timeout), todo, concurrency)
+        for url, (ok, image) in fetched.items():
+            cache.update(url, image, now, failed=not ok)
+        cache.save()
+        print("og:image: fetched %d pages, %d without an image, %d failed" % (
+            len(todo), sum(1 for ok, image in fetched.values() if ok and image is None),
+            sum(1 for ok, image in fetched.values() if not ok)))
+    return cache.images(urls)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="resolve og:image of web pages, or check the resolver against a local stand-in server")
+    parser.add_argument('urls', nargs='*')
+    parser.add_argument('--stand_in', type=int, default=0, metavar='N',
+                        help='serve N synthetic project pages locally and resolve them')
+    parser.add_argument('--delay', type=float, default=0.2,
+                        help='response delay of the stand-in server in seconds')
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = OgImageCache(Path(tmp) / CACHE_FILENAME)
+        if not args.stand_in:
+            for url, image in resolve_og_images(args.urls, cache, args.concurrency).items():
+                print(url, image)
+            return
+
+        pages = {"/p%d/" % i: "<html><head><meta property='og:image' content='img/thumb%d.png'></head><body></body></html>" % i
+                 for i in range(args.stand_in)}
+        pages["/none/"] = "<html><head><title>no image</title></head><body></body></html>"
+        with stand_in_server(pages, args.delay) as base:
+            urls = [base + path for path in pages] + [base + "/missing/"]
+            start = time.perf_counter()
+            images = resolve_og_images(urls, cache, args.concurrency)
+            cold = time.perf_counter() - start
+            assert all(images[base + "/p%d/" % i] == base + "/p%d/img/thumb%d.png" % (i, i) for i in range(args.stand_in))
+            assert base + "/none/" not in images and base + "/missing/" not in images
+            start = time.perf_counter()
+            assert resolve_og_images(urls, OgImageCache(cache.path), args.concurrency) == images
+            warm = time.perf_counter() - start
+        print("%d pages with %.1f s latency: %.2f s cold (concurrency %d), %.4f s from the cache"
+              % (len(urls), args.delay, cold, args.concurrency, warm))
+
+
+if __name__ == "__main__":
+    main()
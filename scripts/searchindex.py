@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import json
+import re
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from authors import latex_to_unicode
+from bibparser import BibEntry
+
+
+INDEX_VERSION = 1
+# Latin words and numbers, or runs of kana/kanji (indexed as bigrams).
+# search.js tokenizes queries with the same rules.
+_TOKEN = re.compile("[a-z0-9]+|[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]+")
+_CJK = re.compile("[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]")
+_LATIN_ACCENT = re.compile("[\u0300-\u036f]")
+
+
+def normalize(text: str) -> str:
+    # "Müller" -> "muller", full-width "ＲＡＬ" -> "ral"; kana voicing marks stay.
+    text = unicodedata.normalize("NFKD", latex_to_unicode(text).replace("{", "").replace("}", ""))
+    return unicodedata.normalize("NFKC", _LATIN_ACCENT.sub("", text)).lower()
+
+
+def tokenize(text: str) -> Iterator[str]:
+    for match in _TOKEN.finditer(normalize(text)):
+        word = match.group(0)
+        if _CJK.match(word):
+            if len(word) == 1:
+                yield word
+            for i in range(len(word) - 1):
+                yield word[i:i + 2]
+        elif len(word) > 1 or word.isdigit():
+            yield word
+
+
+def _link(entry: BibEntry) -> Optional[str]:
+    if "doi" in entry:
+        return "https://doi.org/" + entry["doi"]
+    for name in ("website", "arxiv", "slide", "video"):
+        if name in entry:
+            return entry[name]
+    return None
+
+
+def build_search_index(sections: Sequence[tuple]) -> Dict:
+    # sections: [(heading, entries)] in page order. Returns
+    # {"v", "sections", "docs": [[title, authors, venue, year, section, link]],
+    #  "terms": sorted tokens, "postings": per token, delta-encoded doc ids}.
+    headings: List[str] = []
+    docs: List[list] = []
+    postings: Dict[str, List[int]] = {}
+    for heading, entries in sections:
+        section = len(headings)
+        headings.append(heading)
+        for entry in entries:
+            doc = len(docs)
+            venue = entry.booktitle3 or entry.howpublished or ""
+            title = latex_to_unicode(entry.title or "").replace("{", "").replace("}", "")
+            authors = latex_to_unicode(entry.author or "")
+            docs.append([title, authors, venue, entry.year_num, section, _link(entry)])
+            fields = [title, authors, venue, entry.venue or "", " ".join(entry.robots or ()), str(entry.year_num or "")]
+            for token in set(tokenize(" ".join(fields))):
+                postings.setdefault(token, []).append(doc)
+
+    terms = sorted(postings)
+    encoded = []
+    for term in terms:
+        ids = postings[term]
+        encoded.append([ids[0]] + [b - a for a, b in zip(ids, ids[1:])])
+    return {"v": INDEX_VERSION, "sections": headings, "docs": docs, "terms": terms, "postings": encoded}
+
+
+def dump_search_index(index: Dict) -> str:
+    return json.dumps(index, ensure_ascii=False, separators=(",", ":"))
+
+
+def search(index: Dict, query: str, limit: int = 50) -> List[int]:
+    # Reference implementation of search.js: every query token must match,
+    # the last one as a prefix (search-as-you-type).
+    tokens = list(tokenize(query))
+    if not tokens:
+        return []
+    terms = index["terms"]
+    result: Optional[set] = None
+    for i, token in enumerate(tokens):
+        last = i == len(tokens) - 1 and not _CJK.match(token)
+        matched = set()
+        for term, deltas in zip(terms, index["postings"]):
+            if term == token or (last and term.startswith(token)):
+                doc = 0
+                for j, delta in enumerate(deltas):
+                    doc = delta if j == 0 else doc + delta
+                    matched.add(doc)
+        result = matched if result is None else result & matched
+        if not result:
+            return []
+    return sorted(result)[:limit]
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Dict, List, Tuple
+
+
+# "<!-- robot_replace_by_python -->" in html, "% journal_replace_by_python" in tex
+_PLACEHOLDER = re.compile(r"(\w+?)_replace_by_python")
+
+_cache: Dict[str, Tuple[Tuple[int, int], "Template"]] = {}
+
+
+class Template:
+    # A base file split once into static chunks and named slots. A slot's
+    # content is emitted right before the line holding its placeholder, and
+    # the placeholder line itself is kept.
+    def __init__(self, text: str):
+        self.chunks: List[Tuple[str, str]] = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(text):
+            line_start = text.rfind("\n", 0, match.start()) + 1
+            if line_start < pos:  # a second placeholder on the same line
+                continue
+            self.chunks.append((text[pos:line_start], match.group(1)))
+            pos = line_start
+        self.tail = text[pos:]
+
+    @property
+    def slots(self) -> List[str]:
+        return [slot for _, slot in self.chunks]
+
+    def write(self, fh, slots: Dict[str, str]) -> None:
+        for chunk, slot in self.chunks:
+            fh.write(chunk)
+            try:
+                fh.write(slots[slot])
+            except KeyError:
+                raise KeyError("no content for placeholder '" + slot + "_replace_by_python'") from None
+        fh.write(self.tail)
+
+
+def load_template(path) -> Template:
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as fh:
+        template = Template(fh.read())
+    _cache[path] = (stamp, template)
+    return template
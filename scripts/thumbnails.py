@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import hashlib
+import io
+import json
+import math
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional: without it videos.html keeps the YouTube thumbnails
+    Image = None
+
+from bibparser import CACHE_DIRNAME
+from fetch import fetch, fetch_all, stand_in_server
+from writer import OutputWriter
+
+
+THUMBNAIL_URL = "https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
+CACHE_SUBDIR = "thumbnails"
+SPRITE_DIRNAME = "static/thumbs"
+MANIFEST_FILENAME = "sprites.json"
+# hqdefault is 480x360 with the 16:9 picture letterboxed in the middle;
+# tiles are cropped to the picture and shown at most ~540px wide.
+TILE_SIZE = (320, 180)
+SHEET_COLUMNS = 4
+SHEET_TILES = 24
+JPEG_OPTIONS = {"quality": 80, "optimize": True, "progressive": True}
+# A failed download is retried on the next day; found thumbnails are kept.
+MAX_AGE_MISSING = 24 * 3600
+
+
+def video_id(url: str) -> str:
+    return url.split("=")[1]
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix="." + path.name + ".", suffix=".tmp")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp_name, path)
+
+
+# Downloaded thumbnails stored by the sha1 of their bytes, with an index
+# from video id to that sha1 (or to None and the time of a failed attempt).
+class ThumbnailCache:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.index_path = self.directory / "index.json"
+        self.entries: Dict[str, Dict] = {}
+        try:
+            with self.index_path.open("r", encoding="utf-8") as fh:
+                self.entries = json.load(fh)
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def for_bib(cls, bib_path) -> "ThumbnailCache":
+        return cls(Path(bib_path).parent / CACHE_DIRNAME / CACHE_SUBDIR)
+
+    def path(self, sha1: str) -> Path:
+        return self.directory / (sha1 + ".jpg")
+
+    def get(self, video: str) -> Optional[str]:
+        entry = self.entries.get(video)
+        if entry is None or entry["sha1"] is None or not self.path(entry["sha1"]).exists():
+            return None
+        return entry["sha1"]
+
+    def needs_fetch(self, video: str, now: float) -> bool:
+        entry = self.entries.get(video)
+        if entry is not None and entry["sha1"] is None:
+            return now - entry["checked"] > MAX_AGE_MISSING
+        return self.get(video) is None
+
+    def put(self, video: str, data: Optional[bytes], now: float) -> None:
+        sha1 = None
+        if data:
+            sha1 = hashlib.sha1(data).hexdigest()
+            if not self.path(sha1).exists():
+                _atomic_write(self.path(sha1), data)
+        self.entries[video] = {"sha1": sha1, "checked": now}
+
+    def save(self) -> None:
+        try:
+            _atomic_write(self.index_path, json.dumps(self.entries, indent=1, sort_keys=True).encode("utf-8"))
+        except OSError:
+            pass
+
+
+def fetch_thumbnails(videos: Iterable[str], cache: ThumbnailCache, url_template: str = THUMBNAIL_URL,
+                     concurrency: int = 8, timeout: float = 10.0) -> Dict[str, str]:
+    # Downloads the thumbnails not in the cache yet, at most `concurrency`
+    # at a time, and returns video id -> sha1 for every cached one.
+    videos = list(dict.fromkeys(videos))
+    now = time.time()
+    todo = [video for video in videos if cache.needs_fetch(video, now)]
+    if todo:
+        def download(video):
+            fetched = fetch(url_template.format(video_id=video), timeout)
+            return fetched[0] if fetched else None
+
+        fetched = fetch_all(download, todo, concurrency)
+        for video, data in fetched.items():
+            cache.put(video, data, now)
+        cache.save()
+        print("thumbnails: fetched %d, %d failed" % (len(todo), sum(1 for data in fetched.values() if not data)))
+    return {video: cache.get(video) for video in videos if cache.get(video)}
+
+
+def _tile(path: Path) -> "Image.Image":
+    with Image.open(path) as image:
+        image = image.convert("RGB")
+    width, height = image.size
+    # crop to 16:9 around the centre, which drops hqdefault's black bars
+    crop_height = min(height, round(width * TILE_SIZE[1] / TILE_SIZE[0]))
+    crop_width = min(width, round(crop_height * TILE_SIZE[0] / TILE_SIZE[1]))
+    left, top = (width - crop_width) // 2, (height - crop_height) // 2
+    return image.resize(TILE_SIZE, Image.LANCZOS, box=(left, top, left + crop_width, top + crop_height))
+
+
+def _render_sheet(cache: ThumbnailCache, tiles: Sequence[str]) -> bytes:
+    rows = math.ceil(len(tiles) / SHEET_COLUMNS)
+    columns = min(len(tiles), SHEET_COLUMNS)
+    sheet = Image.new("RGB", (columns * TILE_SIZE[0], rows * TILE_SIZE[1]))
+    for i, sha1 in enumerate(tiles):
+        sheet.paste(_tile(cache.path(sha1)), ((i % SHEET_COLUMNS) * TILE_SIZE[0], (i // SHEET_COLUMNS) * TILE_SIZE[1]))
+    out = io.BytesIO()
+    sheet.save(out, format="JPEG", **JPEG_OPTIONS)
+    return out.getvalue()
+
+
+# Sprite sheets under static/thumbs/ and their manifest (video id -> sheet
+# and tile), committed with the sheets so a checkout without Pillow or
+# network access still serves them. A sheet is named after the thumbnails
+# it holds, so it is only re-rendered when one of them changes.
+class ThumbnailSprites:
+    def __init__(self, root, writer: Optional[OutputWriter] = None):
+        self.root = Path(root)
+        self.writer = writer or OutputWriter()
+        self.directory = self.root / SPRITE_DIRNAME
+        self.manifest_path = self.directory / MANIFEST_FILENAME
+        self.settings = {"tile": list(TILE_SIZE), "columns": SHEET_COLUMNS, "tiles": SHEET_TILES, "jpeg": JPEG_OPTIONS}
+        self.sheets: List[Dict] = []
+        self.cached_settings = None
+        try:
+            with self.manifest_path.open("r", encoding="utf-8") as fh:
+                cached = json.load(fh)
+            self.sheets = cached["sheets"]
+            self.cached_settings = cached["settings"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def manifest(self, videos: Sequence[str]) -> Dict[str, Dict]:
+        # video id -> {"sheet", "index", "count"} for the listed videos whose
+        # sheet exists.
+        wanted = set(videos)
+        result = {}
+        for sheet in self.sheets:
+            if not (self.root / sheet["path"]).exists():
+                continue
+            for i, video in enumerate(sheet["videos"]):
+                if video in wanted:
+                    result[video] = {"sheet": sheet["path"], "index": i, "count": len(sheet["videos"])}
+        return result
+
+    def build(self, videos: Sequence[str], thumbnails: Dict[str, str], cache: ThumbnailCache) -> Dict[str, Dict]:
+        # Packs the cached thumbnails of `videos` (in page order) into sheets.
+        # They are filled oldest first, so a new video only changes the last sheet.
+        if Image is None:
+            print("thumbnails: Pillow is not installed; keeping the YouTube thumbnails")
+            return self.manifest(videos)
+        ordered = [video for video in dict.fromkeys(reversed(videos)) if video in thumbnails]
+        reuse = {sheet["path"]: sheet for sheet in self.sheets} if self.cached_settings == self.settings else {}
+        sheets, rendered = [], 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for start in range(0, len(ordered), SHEET_TILES):
+            chunk = ordered[start:start + SHEET_TILES]
+            tiles = [thumbnails[video] for video in chunk]
+            name = hashlib.sha1(json.dumps([self.settings, tiles]).encode("utf-8")).hexdigest()[:10]
+            path = "%s/sprite-%s.jpg" % (SPRITE_DIRNAME, name)
+            if path not in reuse or not (self.root / path).exists():
+                self.writer.write_bytes(self.root / path, _render_sheet(cache, tiles))
+                rendered += 1
+            sheets.append({"path": path, "videos": chunk})
+        for sheet in self.sheets:  # sheets nothing refers to anymore
+            if sheet["path"] not in {s["path"] for s in sheets}:
+                try:
+                    (self.root / sheet["path"]).unlink()
+                except OSError:
+                    pass
+        self.sheets = sheets
+        self.cached_settings = self.settings
+        self._save()
+        print("thumbnails: %d sheets for %d videos (%d rendered)" % (len(sheets), len(ordered), rendered))
+        return self.manifest(videos)
+
+    def _save(self) -> None:
+        data = json.dumps({"settings": self.cached_settings, "sheets": self.sheets}, indent=1, sort_keys=True)
+        self.writer.write_bytes(self.manifest_path, data.encode("utf-8") + b"\n")
+
+
+def _percent(i: int, n: int) -> str:
+    return "0" if n <= 1 else "%.4g%%" % (100.0 * i / (n - 1))
+
+
+def _sheet_numbers(sprites: Dict[str, Dict]) -> Dict[str, int]:
+    return {sheet: n for n, sheet in enumerate(sorted({entry["sheet"] for entry in sprites.values()}))}
+
+
+def _grid(count: int):
+    return min(count, SHEET_COLUMNS), math.ceil(count / SHEET_COLUMNS)
+
+
+def sprite_css(sprites: Dict[str, Dict]) -> str:
+    # One rule per sheet (image and scale) and one background-position per
+    # video; percentages keep the tiles aligned at any rendered width.
+    rules = [".video-sprite{background-repeat:no-repeat}"]
+    counts = {entry["sheet"]: entry["count"] for entry in sprites.values()}
+    for sheet, n in _sheet_numbers(sprites).items():
+        columns, rows = _grid(counts[sheet])
+        rules.append(".video-sprite-%d{background-image:url(%s);background-size:%d%% %d%%}" % (n, sheet, columns * 100, rows * 100))
+    for video, entry in sorted(sprites.items()):
+        columns, rows = _grid(entry["count"])
+        col, row = entry["index"] % SHEET_COLUMNS, entry["index"] // SHEET_COLUMNS
+        rules.append('.video-sprite[data-thumb="%s"]{background-position:%s %s}' % (video, _percent(col, columns), _percent(row, rows)))
+    return "\n".join(rules)
+
+
+def sprite_classes(sprites: Dict[str, Dict]) -> Dict[str, str]:
+    # video id -> "video-sprite video-sprite-<n>", numbered as in sprite_css
+    numbers = _sheet_numbers(sprites)
+    return {video: "video-sprite video-sprite-%d" % numbers[entry["sheet"]] for video, entry in sprites.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="check the thumbnail download and sprite packing against a local stand-in server")
+    parser.add_argument('--stand_in', type=int, default=30, metavar='N',
+                        help='number of synthetic thumbnails served')
+    parser.add_argument('--delay', type=float, default=0.1,
+                        help='response delay of the stand-in server in seconds')
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    if Image is None:
+        parser.error("Pillow is required")
+
+    pages = {}
+    for i in range(args.stand_in):
+        image = Image.new("RGB", (480, 360))
+        image.paste((40 + i * 7 % 200, 80, 160), (0, 45, 480, 315))  # letterboxed picture
+        out = io.BytesIO()
+        image.save(out, format="JPEG")
+        pages["/vi/v%d/hqdefault.jpg" % i] = out.getvalue()
+    videos = ["v%d" % i for i in range(args.stand_in)] + ["gone"]
+    with tempfile.TemporaryDirectory() as tmp, stand_in_server(pages, args.delay) as base:
+        cache = ThumbnailCache(Path(tmp) / CACHE_SUBDIR)
+        start = time.perf_counter()
+        thumbnails = fetch_thumbnails(videos, cache, base + "/vi/{video_id}/hqdefault.jpg", args.concurrency)
+        cold = time.perf_counter() - start
+        assert set(thumbnails) == set(videos[:-1])
+        start = time.perf_counter()
+        assert fetch_thumbnails(videos, ThumbnailCache(cache.directory), base + "/x/{video_id}", args.concurrency) == thumbnails
+        warm = time.perf_counter() - start
+
+        sprites = ThumbnailSprites(tmp).build(videos, thumbnails, cache)
+        assert set(sprites) == set(thumbnails)
+        for video, entry in sprites.items():
+            with Image.open(Path(tmp) / entry["sheet"]) as sheet:
+                x, y = entry["index"] % SHEET_COLUMNS * TILE_SIZE[0], entry["index"] // SHEET_COLUMNS * TILE_SIZE[1]
+                expected = 40 + int(video[1:]) * 7 % 200
+                assert abs(sheet.getpixel((x + TILE_SIZE[0] // 2, y + TILE_SIZE[1] // 2))[0] - expected) < 8
+        before = {entry["sheet"] for entry in sprites.values()}
+        again = ThumbnailSprites(tmp).build(videos, thumbnails, cache)
+        assert again == sprites
+        print(sprite_css(sprites).count("\n") + 1, "css rules over", len(before), "sheets")
+    print("%d thumbnails with %.1f s latency: %.2f s cold (concurrency %d), %.4f s from the cache"
+          % (len(videos), args.delay, cold, args.concurrency, warm))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Callable, Dict, Iterable, Optional, Set
+
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+_EVENT = struct.Struct("iIII")
+
+
+class _InotifyWatcher:
+    # Watches the parent directories so that editors which save by renaming a
+    # temporary file over the original are still noticed.
+    def __init__(self, paths: Set[str]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: Dict[int, str] = {}
+        self.paths = paths
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        for directory in {os.path.dirname(path) for path in paths}:
+            wd = libc.inotify_add_watch(self.fd, directory.encode(), mask)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed: " + directory)
+            self.dirs[wd] = directory
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        changed: Set[str] = set()
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return changed
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0").decode()
+            offset += length
+            path = os.path.join(self.dirs.get(wd, ""), name)
+            if path in self.paths:
+                changed.add(path)
+        return changed
+
+
+class _PollingWatcher:
+    def __init__(self, paths: Set[str], interval: float = 0.2):
+        self.paths = paths
+        self.interval = interval
+        self.stamps = {path: self._stamp(path) for path in paths}
+
+    @staticmethod
+    def _stamp(path: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path in self.paths:
+                stamp = self._stamp(path)
+                if stamp != self.stamps[path]:
+                    self.stamps[path] = stamp
+                    changed.add(path)
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return changed
+            time.sleep(self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic())))
+
+
+def open_watcher(paths: Set[str], polling: bool = False):
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return _InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return _PollingWatcher(paths)
+
+
+def watch(paths: Iterable[str], callback: Callable[[Set[str]], None], debounce: float = 0.1, polling: bool = False) -> None:
+    # Calls callback(changed_paths) once per burst of changes; a burst ends
+    # when no further change arrives within `debounce` seconds.
+    paths = {os.path.abspath(path) for path in paths}
+    watcher = open_watcher(paths, polling)
+    print("watching (" + type(watcher).__name__.strip("_").replace("Watcher", "").lower() + "): " + ", ".join(sorted(paths)))
+    while True:
+        changed = watcher.wait(None)
+        if not changed:
+            continue
+        while True:
+            more = watcher.wait(debounce)
+            if not more:
+                break
+            changed |= more
+        callback(changed)
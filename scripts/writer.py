@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from typing import List, Optional, Tuple
+
+from minify import minify_html
+
+try:
+    import brotli
+except ImportError:  # .br companions are optional
+    brotli = None
+
+
+def _current_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _current_umask()
+
+# Served text files that get .gz/.br companions with compress=True.
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".svg", ".xml")
+
+
+def _digest(path: str) -> Optional[str]:
+    h = hashlib.sha1()
+    try:
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 16), b""):
+                h.update(block)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+
+class OutputWriter:
+    # Writes every output to a temporary file next to it and renames it into
+    # place only if the content differs, so unchanged files keep their mtime
+    # and an interrupted build never leaves a truncated file behind.
+    # minify shrinks .html outputs; compress adds .gz (and .br with the
+    # brotli module) companions next to the served text files.
+    def __init__(self, minify: bool = False, compress: bool = False):
+        self.minify = minify
+        self.compress = compress
+        self.written: List[Tuple[str, int]] = []
+        self.skipped: List[Tuple[str, int]] = []
+        # (path, generated size, minified size, gzip size, brotli size)
+        self.reductions: List[Tuple[str, int, int, Optional[int], Optional[int]]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def open(self, path, encoding: str = "utf-8", binary: bool = False):
+        path = os.fspath(path)
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_name = tempfile.mkstemp(dir=directory, prefix="." + os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding=encoding)) as fh:
+                yield fh
+            self._commit(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    def write_bytes(self, path, data: bytes) -> None:
+        with self.open(path, binary=True) as fh:
+            fh.write(data)
+
+    def _commit(self, tmp_name: str, path: str) -> None:
+        if (self.minify or self.compress) and path.endswith(COMPRESSIBLE):
+            self._postprocess(tmp_name, path)
+        self._replace(tmp_name, path)
+
+    def _postprocess(self, tmp_name: str, path: str) -> None:
+        with open(tmp_name, "rb") as fh:
+            data = fh.read()
+        original = len(data)
+        if self.minify and path.endswith(".html"):
+            data = minify_html(data.decode("utf-8")).encode("utf-8")
+            with open(tmp_name, "wb") as fh:
+                fh.write(data)
+        gz_size = br_size = None
+        if self.compress:
+            # mtime=0 keeps the .gz bytes, and so the skip check, deterministic
+            gz_size = self._companion(path + ".gz", gzip.compress(data, 9, mtime=0))
+            if brotli is not None:
+                br_size = self._companion(path + ".br", brotli.compress(data, quality=11))
+        with self._lock:
+            self.reductions.append((path, original, len(data), gz_size, br_size))
+
+    def _companion(self, path: str, data: bytes) -> int:
+        fd, tmp_name = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                        prefix="." + os.path.basename(path) + ".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        self._replace(tmp_name, path)
+        return len(data)
+
+    def _replace(self, tmp_name: str, path: str) -> None:
+        size = os.path.getsize(tmp_name)
+        if os.path.exists(path) and os.path.getsize(path) == size and _digest(path) == _digest(tmp_name):
+            os.unlink(tmp_name)
+            with self._lock:
+                self.skipped.append((path, size))
+            return
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_name)
+        else:
+            os.chmod(tmp_name, 0o666 & ~_UMASK)
+        os.replace(tmp_name, path)
+        with self._lock:
+            self.written.append((path, size))
+
+    def report(self) -> str:
+        written = sum(size for _, size in self.written)
+        skipped = sum(size for _, size in self.skipped)
+        lines = ["wrote %d files (%d bytes), skipped %d unchanged (%d bytes)" % (
+            len(self.written), written, len(self.skipped), skipped)]
+        for path, original, minified, gz_size, br_size in sorted(self.reductions):
+            line = "  %s: %d bytes" % (os.path.relpath(path), original)
+            if minified != original:
+                line += ", minified %d (-%.0f%%)" % (minified, 100.0 * (original - minified) / original)
+            for label, size in (("gz", gz_size), ("br", br_size)):
+                if size is not None:
+                    line += ", %s %d (-%.0f%%)" % (label, size, 100.0 * (original - size) / original)
+            lines.append(line)
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.written = []
+            self.skipped = []
+            self.reductions = []
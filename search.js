@@ -0,0 +1,99 @@
+// Publication search over the index written by make_html_from_bib.py --search.
+// The index is fetched the first time the search box is used.
+(function() {
+  var input = document.getElementById("pub-search");
+  if (!input) return;
+  var results = document.getElementById("pub-search-results");
+  var index = null;
+  var loading = null;
+
+  function load() {
+    if (!loading) {
+      loading = fetch(input.dataset.index)
+        .then(function(response) { return response.json(); })
+        .then(function(data) { index = data; });
+    }
+    return loading;
+  }
+
+  // Same rules as searchindex.tokenize: latin words and numbers, kana/kanji
+  // runs as bigrams.
+  var CJK = /[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]/;
+  function tokenize(text) {
+    text = text.normalize("NFKD").replace(/[\u0300-\u036f]/g, "").normalize("NFKC").toLowerCase();
+    var tokens = [];
+    (text.match(/[a-z0-9]+|[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]+/g) || []).forEach(function(word) {
+      if (CJK.test(word[0])) {
+        if (word.length === 1) tokens.push(word);
+        for (var i = 0; i + 1 < word.length; i++) tokens.push(word.slice(i, i + 2));
+      } else if (word.length > 1 || /^[0-9]+$/.test(word)) {
+        tokens.push(word);
+      }
+    });
+    return tokens;
+  }
+
+  function lowerBound(terms, token) {
+    var lo = 0, hi = terms.length;
+    while (lo < hi) {
+      var mid = (lo + hi) >> 1;
+      if (terms[mid] < token) lo = mid + 1; else hi = mid;
+    }
+    return lo;
+  }
+
+  function docs(termIndex, into) {
+    var doc = 0;
+    index.postings[termIndex].forEach(function(delta, i) {
+      doc = i === 0 ? delta : doc + delta;
+      into[doc] = true;
+    });
+  }
+
+  function search(query) {
+    var tokens = tokenize(query);
+    if (!tokens.length) return [];
+    var result = null;
+    for (var t = 0; t < tokens.length; t++) {
+      var token = tokens[t];
+      var prefix = t === tokens.length - 1 && !CJK.test(token[0]);
+      var matched = {};
+      for (var i = lowerBound(index.terms, token); i < index.terms.length; i++) {
+        var term = index.terms[i];
+        if (term !== token && !(prefix && term.lastIndexOf(token, 0) === 0)) break;
+        docs(i, matched);
+      }
+      if (result !== null) {
+        for (var doc in result) if (!matched[doc]) delete result[doc];
+      } else {
+        result = matched;
+      }
+    }
+    return Object.keys(result).map(Number).sort(function(a, b) { return a - b; });
+  }
+
+  function escapeHtml(text) {
+    return String(text).replace(/[&<>"']/g, function(c) {
+      return {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"}[c];
+    });
+  }
+
+  function render(query) {
+    var hits = search(query);
+    var html = hits.slice(0, 50).map(function(id) {
+      var doc = index.docs[id];  // [title, authors, venue, year, section, link]
+      var title = doc[5] ? "<a href='" + escapeHtml(doc[5]) + "' target='_blank' rel='noopener noreferrer'>" + escapeHtml(doc[0]) + "</a>" : escapeHtml(doc[0]);
+      return "<li>" + escapeHtml(doc[1]) + "<br>" + title + (doc[2] ? ", <i>" + escapeHtml(doc[2]) + "</i>" : "")
+        + (doc[3] ? ", " + doc[3] : "") + " <small class='text-muted'>(" + escapeHtml(index.sections[doc[4]]) + ")</small></li>";
+    }).join("");
+    if (query.trim() && !hits.length) html = "<li class='text-muted'>No publications found.</li>";
+    else if (hits.length > 50) html += "<li class='text-muted'>" + (hits.length - 50) + " more</li>";
+    results.innerHTML = html;
+  }
+
+  input.addEventListener("focus", load, {once: true});
+  input.addEventListener("input", function() {
+    var query = input.value;
+    load().then(function() { if (input.value === query) render(query); });
+  });
+})();
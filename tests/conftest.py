@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+import sys
+from pathlib import Path
+
+# The build scripts import each other as top-level modules.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
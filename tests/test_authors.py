@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+from authors import AuthorRegistry, surname_aliases
+
+
+def test_surname_aliases_join_japanese_and_romanized_names():
+    names = ["河原塚 健人", "K. Kawaharazuka", "岡田 慧", "Kento Kawaharazuka", "河原塚健人"]
+    registry = AuthorRegistry(surname_aliases(names, "河原塚", "Kawaharazuka"))
+    ids = {registry.intern(name) for name in names}
+    assert len(ids) == 2
+    assert registry.display("河原塚健人") == "河原塚 健人"
+    assert registry.get("K. Kawaharazuka") == registry.get("河原塚 健人")
+    assert registry.get("岡田 慧") != registry.get("河原塚 健人")
+    assert surname_aliases(["岡田 慧"], "河原塚", "Kawaharazuka") == {}
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import io
+
+from awards import AwardIndex
+from make_html_from_bib import MakeHTML
+
+
+def _index(n):
+    index = AwardIndex()
+    index.begin()
+    for i in range(n):
+        index.add(i, (2020 + i, 1, 1), "h%d" % i)
+    index.end()
+    return index
+
+
+def test_top_n():
+    index = _index(5)
+    assert index.top(2) == ["h4", "h3"]
+    assert index.top(5) == ["h4", "h3", "h2", "h1", "h0"]
+    assert index.top(7) == ["h4", "h3", "h2", "h1", "h0"]
+    assert index.top(0) == []
+    assert index.top() == index.top(5)
+
+
+def test_in_year_and_rebuild():
+    index = _index(3)
+    index.begin()
+    index.add(0, (2020, 1, 1), "h0")
+    index.add(2, (2021, 0, 0), "h2")  # moved to a year-only date
+    index.end()  # item 1 is gone
+    assert index.top() == ["h2", "h0"]
+    assert index.in_year(2021) == ["h2"]
+    assert index.in_year(2022) == []
+    assert index.years() == [2021, 2020]
+
+
+def test_awards_of_entries_sharing_a_bib_key(tmp_path):
+    # Bib keys are not unique (main.bib repeats invited2025space-ja); both
+    # awards must be listed.
+    bib = tmp_path / "t.bib"
+    bib.write_text("""% reviewed_iconference
+@inproceedings{dup, author={K. Kawaharazuka}, title={A}, booktitle={X}, year={2024}, date={2024.1.1}, award={Best Paper}}
+@inproceedings{dup, author={K. Kawaharazuka}, title={B}, booktitle={Y}, year={2024}, date={2024.1.1}, award={Best Paper}}
+""", encoding="utf-8")
+    make = MakeHTML(str(bib), use_cache=False)
+    make.parse_bib()
+    with contextlib.redirect_stdout(io.StringIO()):
+        make.make_pub()
+    assert make.html_award.count("<li>") == 2
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+
+from bibparser import parse_bib_text
+
+
+def test_doubled_and_separates_two_authors():
+    # main.bib has "Y. Obinata and and K. Shinjo"; the old line-based chart
+    # parser counted "and K. Shinjo" as an author of its own.
+    db = parse_bib_text("""% ijournal_papers
+@article{x, author={Y. Obinata and and K. Shinjo and K. Kawaharazuka}, title={T}, journal={J}, year={2023}}
+""")
+    assert db.sections["ijournal_papers"][0].authors == ["Y. Obinata", "K. Shinjo", "K. Kawaharazuka"]
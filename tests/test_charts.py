@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+
+from build_static_charts import _top_n_authors
+
+
+def test_top_authors_break_ties_by_name():
+    df = pd.DataFrame({
+        "year": [2020, 2021, 2020, 2020, 2021, 2020],
+        "author": ["S. Yuzaki", "S. Yuzaki", "M. Kawamura", "M. Kawamura", "A. Top", "A. Top"],
+        "count": [1, 1, 1, 1, 2, 3],
+    })
+    assert _top_n_authors(df, "author", "count") == ["A. Top", "M. Kawamura", "S. Yuzaki"]
+    assert _top_n_authors(df, "author", "count", n=2) == ["A. Top", "M. Kawamura"]
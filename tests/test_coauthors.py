@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+from bibparser import parse_bib_text
+from bibtable import AuthorshipTable
+from coauthors import CoauthorGraph
+
+
+def test_coauthored_counts_papers_not_pairs():
+    db = parse_bib_text("""% ijournal_papers
+@article{a, author={A. One and B. Two and C. Three}, title={T}, journal={J}, year={2023}}
+@article{b, author={A. One and B. Two}, title={T}, journal={J}, year={2024}}
+@article{c, author={A. One}, title={T}, journal={J}, year={2024}}
+""")
+    graph = CoauthorGraph(AuthorshipTable(db.sections["ijournal_papers"]))
+    df = graph.degree_frame().set_index("author")
+    assert df.loc["A. One", "coauthored"] == 2
+    assert df.loc["C. Three", "coauthored"] == 1
+    assert graph.strength[graph.author_codes["A. One"]] == 3
+    assert graph.top_collaborators("A. One") == [("B. Two", 2), ("C. Three", 1)]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+from fetch import stand_in_server
+from ogimage import MAX_AGE, OgImageCache, resolve_og_images
+
+
+def test_failed_refetch_keeps_the_known_image(tmp_path):
+    cache = OgImageCache(tmp_path / "og_images.json")
+    with stand_in_server({"/p/": "<html><head><meta property='og:image' content='a.png'></head></html>"}) as base:
+        url = base + "/p/"
+        assert resolve_og_images([url], cache) == {url: base + "/p/a.png"}
+    cache.entries[url]["checked"] -= MAX_AGE + 1
+    # the server is gone now
+    assert resolve_og_images([url], cache, timeout=1) == {url: base + "/p/a.png"}
+    assert not cache.is_stale(url, cache.entries[url]["checked"])
+
+
+def test_page_without_image_is_cached_as_missing(tmp_path):
+    cache = OgImageCache(tmp_path / "og_images.json")
+    with stand_in_server({"/p/": "<html><head></head></html>"}) as base:
+        assert resolve_og_images([base + "/p/"], cache) == {}
+        assert cache.entries[base + "/p/"]["image"] is None